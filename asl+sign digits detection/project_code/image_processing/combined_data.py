@@ -1,55 +1,149 @@
 import os
 import shutil
-import numpy as np
-import cv2
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
+from convert_grayscale_to_rgb import convert_gray_array, load_gray_array
 
-# Function to copy images from ASL Alphabet Dataset to combined data
-def combine_asl_alphabet(input_dir, output_dir):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+image_exts = ('.jpg', '.jpeg', '.png')
+LINK_MODE = "hardlink"  # "hardlink" or "copy"; hardlinks fall back to copying across filesystems
+COPY_THREADS = 16
 
-    for foldername in tqdm(os.listdir(input_dir)):
+# Function to plan the ASL Alphabet Dataset copy: [(source image, destination)]
+def plan_asl_alphabet(input_dir, output_dir):
+    plan = []
+    for foldername in sorted(os.listdir(input_dir)):
         folder_path = os.path.join(input_dir, foldername)
         if os.path.isdir(folder_path):
             output_folder = os.path.join(output_dir, foldername)
-            if not os.path.exists(output_folder):
-                os.makedirs(output_folder)
+            # Any case of the extension (.JPG, .Png, ...)
+            for entry in sorted(os.scandir(folder_path), key=lambda e: e.name):
+                if entry.is_file() and entry.name.lower().endswith(image_exts):
+                    plan.append((entry.path, os.path.join(output_folder, entry.name)))
+    return plan
 
-            # Copy images from the ASL Alphabet dataset
-            for filename in os.listdir(folder_path):
-                if filename.endswith(".jpg") or filename.endswith(".png"):
-                    img_path = os.path.join(folder_path, filename)
-                    shutil.copy(img_path, output_folder)
-
-# Function to combine the Sign Language Digits Dataset (npy format)
-def combine_digits(input_dir, output_dir):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    for filename in tqdm(os.listdir(input_dir)):
+# Function to plan the Sign Language Digits conversion: [((npy path, image index), destination)]
+def plan_digits(input_dir):
+    plan = []
+    for filename in sorted(os.listdir(input_dir)):
         if filename.endswith(".npy"):
             file_path = os.path.join(input_dir, filename)
-            data = np.load(file_path)
+            data = load_gray_array(file_path)  # Memory-mapped, only the header is read here
+            if data.ndim != 3:
+                print(f"⚠️ Skipping {filename}: not a grayscale image array (shape {data.shape})")
+                continue
+            plan.extend(((file_path, i), f"{filename}_{i}.jpg") for i in range(len(data)))
+    return plan
+
+# Two sources must never write the same file. Names are compared case-insensitively (macOS and Windows
+# filesystems are), the first source in plan order keeps the name and later ones get _1, _2, ...
+def resolve_collisions(plan):
+    taken = set()
+    resolved = []
+    renamed = 0
+    for src, dst in plan:
+        candidate = dst
+        stem, ext = os.path.splitext(dst)
+        n = 0
+        while candidate.lower() in taken:
+            n += 1
+            candidate = f"{stem}_{n}{ext}"
+        taken.add(candidate.lower())
+        resolved.append((src, candidate))
+        renamed += n > 0
+    return resolved, renamed
+
+def is_up_to_date(src_stat, dst_path, mode):
+    try:
+        dst_stat = os.stat(dst_path)
+    except FileNotFoundError:
+        return False
+    if mode == "hardlink" and (dst_stat.st_ino, dst_stat.st_dev) == (src_stat.st_ino, src_stat.st_dev):
+        return True
+    return dst_stat.st_size == src_stat.st_size and dst_stat.st_mtime_ns >= src_stat.st_mtime_ns
+
+def link_or_copy(src, dst, mode=LINK_MODE):
+    tmp = dst + ".tmp"
+    if mode == "hardlink":
+        try:
+            os.link(src, tmp)
+            os.replace(tmp, dst)
+            return "linked"
+        except OSError:
+            pass  # Different filesystem or no hardlink support
+    shutil.copy2(src, tmp)
+    os.replace(tmp, dst)  # A half-copied file is never mistaken for an up-to-date one
+    return "copied"
 
-            # Convert images to the required format
-            for i, img in enumerate(data):
-                img_rgb = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)  # Ensure it's RGB
-                output_path = os.path.join(output_dir, f"{filename}_{i}.jpg")
-                cv2.imwrite(output_path, img_rgb)
+# Function to link/copy images from ASL Alphabet Dataset to combined data, skipping up-to-date files
+def combine_asl_alphabet(plan, mode=LINK_MODE, threads=COPY_THREADS):
+    counts = {"linked": 0, "copied": 0, "skipped": 0}
+    sizes = {"linked": 0, "copied": 0, "skipped": 0}
+    for folder in sorted({os.path.dirname(dst) for _, dst in plan}):
+        os.makedirs(folder, exist_ok=True)
+
+    def work(item):
+        src, dst = item
+        src_stat = os.stat(src)
+        if is_up_to_date(src_stat, dst, mode):
+            return "skipped", src_stat.st_size
+        return link_or_copy(src, dst, mode), src_stat.st_size
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for action, size in tqdm(pool.map(work, plan), total=len(plan), desc="🔗 ASL alphabet"):
+            counts[action] += 1
+            sizes[action] += size
+    return counts, sizes
+
+# Function to combine the Sign Language Digits Dataset (npy format), only images older than their array
+def combine_digits(plan, workers=None):
+    counts = {"converted": 0, "skipped": 0}
+    by_array = {}
+    for (file_path, i), dst in plan:
+        by_array.setdefault(file_path, []).append((i, dst))
+
+    for file_path, items in by_array.items():
+        data = load_gray_array(file_path)  # Memory-mapped, never fully loaded
+        array_mtime = os.stat(file_path).st_mtime_ns
+        output_paths = [None] * len(data)
+        for i, dst in items:
+            if os.path.exists(dst) and os.stat(dst).st_mtime_ns >= array_mtime:
+                counts["skipped"] += 1
+            else:
+                output_paths[i] = dst
+        if any(output_paths):
+            os.makedirs(os.path.dirname(items[0][1]), exist_ok=True)
+            # Convert images to the required format, chunk by chunk
+            counts["converted"] += convert_gray_array(data, output_paths, workers=workers,
+                                                      desc=os.path.basename(file_path))
+    return counts
 
 # Main function to combine both datasets
-def combine_datasets():
+def combine_datasets(mode=LINK_MODE, workers=None):
     # Updated paths based on your directory structure
     asl_alphabet_dir = 'data/raw_data/asl_alphabet_dataset'  # Correct path for ASL alphabet dataset
     signlanguage_digits_dir = 'data/raw_data/signlanguage_digits_dataset'  # Correct path for Sign Language Digits dataset
     combined_data_dir = 'data/combined_data/images'  # Combined data directory
 
+    # One plan for both datasets, so name collisions between them are resolved the same way on every run
+    asl_plan = plan_asl_alphabet(asl_alphabet_dir, combined_data_dir)
+    digits_plan = [(key, os.path.join(combined_data_dir, name)) for key, name in plan_digits(signlanguage_digits_dir)]
+    plan, renamed = resolve_collisions(asl_plan + digits_plan)
+
     # Combine both datasets into the unified folder
-    combine_asl_alphabet(asl_alphabet_dir, combined_data_dir)
-    combine_digits(signlanguage_digits_dir, combined_data_dir)
+    asl_counts, asl_sizes = combine_asl_alphabet(plan[:len(asl_plan)], mode, workers or COPY_THREADS)
+    digit_counts = combine_digits(plan[len(asl_plan):], workers)
 
+    print("📊 ASL alphabet | " + " | ".join(f"{action.capitalize()}: {asl_counts[action]} ({asl_sizes[action] / 1e6:.1f} MB)"
+                                          for action in ["linked", "copied", "skipped"]))
+    print(f"📊 Digits       | Converted: {digit_counts['converted']} | Skipped: {digit_counts['skipped']}")
+    if renamed:
+        print(f"⚠️ {renamed} files renamed to avoid name collisions")
     print("✅ Datasets have been combined successfully!")
 
 if __name__ == "__main__":
-    combine_datasets()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Combine the ASL alphabet and Sign Language Digits datasets")
+    parser.add_argument("--mode", choices=["hardlink", "copy"], default=LINK_MODE)
+    parser.add_argument("--workers", type=int, help="Copy/encode threads (default: one per CPU for encoding)")
+    args = parser.parse_args()
+    combine_datasets(args.mode, args.workers)
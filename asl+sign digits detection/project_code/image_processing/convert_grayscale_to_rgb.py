@@ -0,0 +1,85 @@
+import os
+import numpy as np
+import cv2
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from tqdm import tqdm
+
+# Streaming converter for grayscale image arrays stored as .npy (e.g. the Sign Language Digits X.npy)
+# The array is memory-mapped and handled in chunks: float 0–1 -> uint8, one resize per chunk,
+# gray -> RGB by broadcasting, and JPEG encoding on a thread pool (cv2.imwrite releases the GIL).
+# Peak memory is a few chunks, however large the array is.
+
+CHUNK_SIZE = 256  # Images per chunk
+MAX_RESIZE_CHANNELS = 128  # cv2.resize takes at most this many channels per call on newer OpenCV builds
+
+
+def load_gray_array(npy_path):
+    return np.load(npy_path, mmap_mode="r")
+
+
+# Chunk of (n, H, W) floats in 0–1 or uint8 -> uint8
+def to_uint8(chunk):
+    if chunk.dtype == np.uint8:
+        return np.asarray(chunk)
+    if np.issubdtype(chunk.dtype, np.floating):
+        return (np.asarray(chunk) * 255).astype(np.uint8)  # Convert from 0–1 float to 0–255 image
+    return np.clip(chunk, 0, 255).astype(np.uint8)
+
+
+# Resize a whole (n, H, W) stack at once by treating the images as channels of one image
+def resize_stack(gray, size):
+    if size is None or (gray.shape[2], gray.shape[1]) == tuple(size):
+        return gray
+    interpolation = cv2.INTER_AREA if size[0] < gray.shape[2] else cv2.INTER_CUBIC
+    resized = []
+    for start in range(0, len(gray), MAX_RESIZE_CHANNELS):
+        stack = np.ascontiguousarray(gray[start:start + MAX_RESIZE_CHANNELS].transpose(1, 2, 0))
+        out = cv2.resize(stack, tuple(size), interpolation=interpolation)
+        resized.append(out.reshape(size[1], size[0], -1).transpose(2, 0, 1))
+    return np.concatenate(resized)
+
+
+# (n, H, W) -> (n, H, W, 3) view, no copy
+def gray_to_rgb(gray):
+    return np.broadcast_to(gray[..., None], gray.shape + (3,))
+
+
+def _write_images(images, paths):
+    for image, path in zip(images, paths):
+        cv2.imwrite(path, np.ascontiguousarray(image))
+    return len(paths)
+
+
+# Convert every image of an (N, H, W) array; output_paths[i] is where image i goes (None to skip it)
+def convert_gray_array(array, output_paths, size=None, chunk_size=CHUNK_SIZE, workers=None, desc="Converting"):
+    workers = workers or os.cpu_count() or 1
+    written = 0
+    pending = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool, tqdm(total=len(array), desc=desc) as progress:
+        for start in range(0, len(array), chunk_size):
+            paths = output_paths[start:start + chunk_size]
+            rgb = gray_to_rgb(resize_stack(to_uint8(array[start:start + chunk_size]), size))
+
+            keep = [i for i, path in enumerate(paths) if path is not None]
+            # Split the chunk so every worker gets a share of the encoding
+            step = max(1, -(-len(keep) // workers))
+            for i in range(0, len(keep), step):
+                part = keep[i:i + step]
+                pending.add(pool.submit(_write_images, rgb[part], [paths[j] for j in part]))
+
+            # Bound the number of chunks in flight
+            while len(pending) > 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                written += sum(f.result() for f in done)
+            progress.update(len(paths))
+
+        for future in pending:
+            written += future.result()
+    return written
+
+
+def convert_npy(npy_path, output_paths, size=None, chunk_size=CHUNK_SIZE, workers=None):
+    array = load_gray_array(npy_path)
+    if array.ndim != 3:
+        raise ValueError(f"{npy_path} is not an (N, H, W) grayscale image array: shape {array.shape}")
+    return convert_gray_array(array, output_paths, size, chunk_size, workers, desc=os.path.basename(npy_path))
@@ -0,0 +1,291 @@
+import os
+import re
+import json
+import zlib
+import argparse
+from multiprocessing import Pool
+import numpy as np
+import cv2
+from tqdm import tqdm
+
+# ------------------------------------
+# Bbox-aware augmentation of the labeled yolo_images
+# ------------------------------------
+# Run after bounding_box_generation.py. Every labeled image gets N augmented copies next to it,
+# <stem>_aug<k>.jpg + <stem>_aug<k>.txt, made with one random affine warp each (rotation, scale,
+# translation and an optional horizontal flip). The YOLO boxes go through the same matrix, so the
+# copies need no MediaPipe pass; bounding_box_generation.py skips files ending in AUGMENTED_TAG<k>.
+#
+# Random parameters come from a generator seeded with (seed, image path), so the output is the same
+# for any number of workers and any processing order.
+#
+#   python image_processing/data_augmentation.py --copies 3
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGE_DIR = os.path.join(BASE_DIR, "data", "yolo_images")
+SETTINGS_FILE = "augmentation_settings.json"  # Settings of the last run, kept in the image folder
+
+image_exts = ('.jpg', '.jpeg', '.png')
+AUGMENTED_TAG = "_aug"  # Same tag as bounding_box_generation.py
+AUGMENTED_SUFFIX = re.compile(re.escape(AUGMENTED_TAG) + r"\d+$")  # Whole <stem>_aug<k> suffix, not any "_aug"
+COPIES = 2
+SEED = 42
+BATCH_SIZE = 32  # Source images per work item
+
+ROTATION = 15.0  # Degrees, either way
+SCALE = (0.85, 1.15)
+TRANSLATE = 0.1  # Fraction of the image size, either way
+FLIP_PROB = 0.5
+MIN_VISIBLE = 0.6  # Drop a copy when less than this fraction of a box stays inside the image
+FILL_VALUE = (114, 114, 114)  # Border color, same gray YOLO uses for letterboxing
+
+# A horizontal flip turns a right-hand sign into the same sign made with the left hand, which is fine
+# for static handshapes. J and Z are written by tracing a path, and mirroring reverses its direction,
+# so those classes are never flipped.
+NO_FLIP_CLASSES = {'J', 'Z'}
+
+
+def is_augmented(file_name):
+    return AUGMENTED_SUFFIX.search(os.path.splitext(file_name)[0]) is not None
+
+
+def read_labels(txt_path):
+    rows = []
+    with open(txt_path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 5:
+                rows.append([float(p) for p in parts])
+    rows = np.asarray(rows, dtype=np.float64).reshape(-1, 5)
+    return rows[:, 0].astype(np.int64), rows[:, 1:]
+
+
+# ------------------------------------
+# Random affine matrices for a batch, shape (n, 2, 3)
+# ------------------------------------
+def random_affines(params, sizes):
+    angle, scale, tx, ty, flip = params.T
+    w = sizes[:, 0].astype(np.float64)
+    h = sizes[:, 1].astype(np.float64)
+
+    theta = np.deg2rad(angle)
+    cos, sin = np.cos(theta) * scale, np.sin(theta) * scale
+    mirror = np.where(flip > 0, -1.0, 1.0)
+
+    # Linear part: rotate+scale after mirroring x; then move the center to the shifted center
+    linear = np.empty((len(params), 2, 2))
+    linear[:, 0, 0] = cos * mirror
+    linear[:, 0, 1] = sin
+    linear[:, 1, 0] = -sin * mirror
+    linear[:, 1, 1] = cos
+    center = np.stack([w / 2, h / 2], axis=1)
+    shift = center + np.stack([tx * w, ty * h], axis=1) - np.einsum("nij,nj->ni", linear, center)
+    return np.concatenate([linear, shift[:, :, None]], axis=2)
+
+
+def sample_params(rng, copies, allow_flip):
+    params = np.empty((copies, 5))
+    params[:, 0] = rng.uniform(-ROTATION, ROTATION, copies)
+    params[:, 1] = rng.uniform(*SCALE, copies)
+    params[:, 2:4] = rng.uniform(-TRANSLATE, TRANSLATE, (copies, 2))
+    flips = rng.random(copies) < FLIP_PROB
+    params[:, 4] = flips & allow_flip
+    return params
+
+
+# ------------------------------------
+# Transform YOLO boxes: every corner goes through its image's matrix, the new box is their envelope
+# ------------------------------------
+def transform_boxes(yolo_boxes, matrices, sizes):
+    wh = sizes.astype(np.float64)
+    cx, cy, bw, bh = (yolo_boxes * np.repeat(wh, 2, axis=1)).T
+    x1, y1, x2, y2 = cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2
+
+    corners = np.stack([np.stack([x1, y1], 1), np.stack([x2, y1], 1),
+                        np.stack([x2, y2], 1), np.stack([x1, y2], 1)], axis=1)  # (rows, 4, 2)
+    moved = np.einsum("rij,rkj->rki", matrices[:, :, :2], corners) + matrices[:, None, :, 2]
+
+    lo = moved.min(axis=1)
+    hi = moved.max(axis=1)
+    full_area = np.prod(hi - lo, axis=1)
+    lo_c = np.clip(lo, 0, wh)
+    hi_c = np.clip(hi, 0, wh)
+    visible = np.prod(hi_c - lo_c, axis=1) / np.maximum(full_area, 1e-9)
+
+    out = np.stack([(lo_c[:, 0] + hi_c[:, 0]) / 2, (lo_c[:, 1] + hi_c[:, 1]) / 2,
+                    hi_c[:, 0] - lo_c[:, 0], hi_c[:, 1] - lo_c[:, 1]], axis=1)
+    return out / np.repeat(wh, 2, axis=1), visible
+
+
+def format_yolo_line(class_id, yolo_box):
+    x_center, y_center, box_w, box_h = yolo_box
+    return f"{class_id} {x_center:.6f} {y_center:.6f} {box_w:.6f} {box_h:.6f}"
+
+
+def output_stem(stem, k):
+    return f"{stem}{AUGMENTED_TAG}{k}"
+
+
+# ------------------------------------
+# Work item: one batch of labeled images from a class folder
+# ------------------------------------
+def augment_batch(job):
+    class_folder, class_path, names, copies, seed, allow_flip = job
+
+    images, sizes, label_sets, params = [], [], [], []
+    for name in names:
+        image = cv2.imread(os.path.join(class_path, name))
+        if image is None:
+            continue
+        stem, _ = os.path.splitext(name)
+        images.append((stem, os.path.splitext(name)[1], image))
+        sizes.append((image.shape[1], image.shape[0]))
+        label_sets.append(read_labels(os.path.join(class_path, stem + ".txt")))
+        rng = np.random.default_rng([seed, zlib.crc32(f"{class_folder}/{name}".encode())])
+        params.append(sample_params(rng, copies, allow_flip))
+
+    if not images:
+        return 0, 0
+
+    # One matrix per (image, copy), computed for the whole batch at once
+    sizes = np.asarray(sizes, dtype=np.int64)
+    copy_sizes = np.repeat(sizes, copies, axis=0)
+    matrices = random_affines(np.concatenate(params), copy_sizes)
+
+    # Every box of every copy in one array; owner says which (image, copy) row it belongs to
+    counts = np.array([len(classes) for classes, _ in label_sets])
+    owners_image = np.repeat(np.arange(len(images)), counts)
+    row_boxes = np.concatenate([boxes for _, boxes in label_sets]) if counts.sum() else np.empty((0, 4))
+    row_classes = np.concatenate([classes for classes, _ in label_sets]) if counts.sum() else np.empty(0, np.int64)
+    owners = (owners_image[:, None] * copies + np.arange(copies)).ravel()
+    new_boxes, visible = transform_boxes(np.repeat(row_boxes, copies, axis=0), matrices[owners], copy_sizes[owners])
+    new_classes = np.repeat(row_classes, copies)
+
+    written = dropped = 0
+    for copy_idx in range(len(matrices)):
+        rows = owners == copy_idx
+        stem, ext, image = images[copy_idx // copies]
+        out_stem = output_stem(stem, copy_idx % copies)
+        out_image = os.path.join(class_path, out_stem + ext)
+        out_label = os.path.join(class_path, out_stem + ".txt")
+
+        if not rows.any() or (visible[rows] < MIN_VISIBLE).any():
+            # The hand left the frame: no copy rather than a wrong label
+            for path in (out_image, out_label):
+                if os.path.exists(path):
+                    os.remove(path)
+            dropped += 1
+            continue
+
+        w, h = copy_sizes[copy_idx]
+        warped = cv2.warpAffine(image, matrices[copy_idx], (int(w), int(h)), flags=cv2.INTER_LINEAR,
+                                borderMode=cv2.BORDER_CONSTANT, borderValue=FILL_VALUE)
+        cv2.imwrite(out_image, warped)
+        with open(out_label, "w") as f:
+            f.write("\n".join(format_yolo_line(c, box) for c, box in zip(new_classes[rows], new_boxes[rows])))
+        written += 1
+    return written, dropped
+
+
+# ------------------------------------
+# Plan: source images that need (re)augmenting, and stale copies to delete
+# ------------------------------------
+def settings_dict(copies, seed, no_flip):
+    return {"copies": copies, "seed": seed, "rotation": ROTATION, "scale": list(SCALE), "translate": TRANSLATE,
+            "flip_prob": FLIP_PROB, "no_flip": sorted(no_flip), "min_visible": MIN_VISIBLE}
+
+
+def plan_class(class_path, copies, force):
+    sources = {}
+    labels = {}
+    augmented = {}
+    for entry in os.scandir(class_path):
+        stem, ext = os.path.splitext(entry.name)
+        if is_augmented(entry.name):
+            augmented[entry.name] = entry.stat().st_mtime_ns
+        elif ext.lower() in image_exts:
+            sources[entry.name] = entry.stat().st_mtime_ns
+        elif ext == ".txt":
+            labels[stem] = entry.stat().st_mtime_ns
+
+    todo = []
+    expected = set()
+    for name in sorted(sources):
+        stem, ext = os.path.splitext(name)
+        if stem not in labels:
+            continue  # No hand found: nothing to transform
+        newest_source = max(sources[name], labels[stem])
+        outputs = [output_stem(stem, k) + e for k in range(copies) for e in (ext, ".txt")]
+        expected.update(outputs)
+        # Copies whose box left the frame are never written, so only existing outputs are compared
+        existing = [augmented[out] for out in outputs if out in augmented]
+        if force or not existing or min(existing) < newest_source:
+            todo.append(name)
+
+    stale = [name for name in augmented if name not in expected]
+    return todo, stale
+
+
+def augment_dataset(image_dir=IMAGE_DIR, copies=COPIES, seed=SEED, workers=1, batch_size=BATCH_SIZE,
+                    no_flip=NO_FLIP_CLASSES, force=False):
+    settings = settings_dict(copies, seed, no_flip)
+    settings_path = os.path.join(image_dir, SETTINGS_FILE)
+    if os.path.exists(settings_path):
+        with open(settings_path) as f:
+            force = force or json.load(f) != settings  # New parameters: every copy is out of date
+
+    jobs = []
+    removed = 0
+    for class_folder in sorted(os.listdir(image_dir)):
+        class_path = os.path.join(image_dir, class_folder)
+        if not os.path.isdir(class_path):
+            continue
+        todo, stale = plan_class(class_path, copies, force)
+        for name in stale:
+            os.remove(os.path.join(class_path, name))
+        removed += len(stale)
+        for start in range(0, len(todo), batch_size):
+            jobs.append((class_folder, class_path, todo[start:start + batch_size], copies, seed,
+                         class_folder not in no_flip))
+
+    total_images = sum(len(job[2]) for job in jobs)
+    written = dropped = 0
+    with tqdm(total=total_images, desc="🎨 Augmenting images") as progress:
+        if workers > 1 and len(jobs) > 1:
+            with Pool(processes=workers) as pool:
+                for job, (w, d) in zip(jobs, pool.imap(augment_batch, jobs)):
+                    written += w
+                    dropped += d
+                    progress.update(len(job[2]))
+        else:
+            for job in jobs:
+                w, d = augment_batch(job)
+                written += w
+                dropped += d
+                progress.update(len(job[2]))
+
+    with open(settings_path, "w") as f:
+        json.dump(settings, f, indent=2)
+
+    print(f"📊 Sources: {total_images} | Copies written: {written} | Dropped (box left frame): {dropped} | "
+          f"Stale removed: {removed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write augmented copies of labeled images with transformed YOLO labels")
+    parser.add_argument("--image-dir", default=IMAGE_DIR)
+    parser.add_argument("--copies", type=int, default=COPIES, help="Augmented copies per labeled image")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = serial)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--no-flip", nargs="*", metavar="CLASS",
+                        help="Classes never mirrored (default: J Z); pass no names to allow flipping every class")
+    parser.add_argument("--force", action="store_true", help="Regenerate every copy")
+    args = parser.parse_args()
+
+    no_flip = NO_FLIP_CLASSES if args.no_flip is None else set(args.no_flip)
+    augment_dataset(args.image_dir, args.copies, args.seed, args.workers, args.batch_size, no_flip, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+import os
+import json
+import shutil
+import string
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+# ------------------------------------
+# Columnar label store for a YOLO split
+# ------------------------------------
+# All labels of a split live in a few flat arrays instead of one .txt per image:
+#
+#   files      image file names (image id = position in this list)
+#   sizes      int32 (n_images, 2) width, height (only when loaded with sizes, needed for COCO)
+#   image_ids  int32 (n_boxes,) image each box belongs to, sorted
+#   classes    int16 (n_boxes,)
+#   boxes      float32 (n_boxes, 4) normalized cx, cy, w, h
+#
+# Loading parses the whole split in one pass; stats, class remapping and COCO conversion are array
+# operations on top of it, and YOLO files are written back in bulk.
+#
+#   python image_processing/label_formatting.py stats --dataset data/yolo_dataset --split train
+#   python image_processing/label_formatting.py to-coco --split val --output val_coco.json
+#   python image_processing/label_formatting.py remap --to combined --output data/yolo_dataset_39
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_DIR = os.path.join(BASE_DIR, "data", "yolo_dataset")
+
+image_exts = ('.jpg', '.jpeg', '.png')
+SIZE_READ_THREADS = 16
+MALFORMED_SHOWN = 5  # Malformed label lines listed by name, the rest are only counted
+
+# Class maps of the two projects: asl_detection (A–Z) and this one (0–9, A–Z, del, nothing, space)
+digit_labels = [str(i) for i in range(10)]
+letter_labels = list(string.ascii_uppercase)
+extra_labels = ['del', 'nothing', 'space']
+ASL_NAMES = letter_labels
+COMBINED_NAMES = digit_labels + letter_labels + extra_labels
+CLASS_MAPS = {"asl": ASL_NAMES, "combined": COMBINED_NAMES}
+
+
+class LabelStore:
+    def __init__(self, files, image_ids, classes, boxes, sizes=None):
+        self.files = list(files)
+        self.image_ids = np.asarray(image_ids, dtype=np.int32)
+        self.classes = np.asarray(classes, dtype=np.int16)
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.sizes = None if sizes is None else np.asarray(sizes, dtype=np.int32).reshape(-1, 2)
+
+    def __len__(self):
+        return len(self.classes)
+
+    # Box rows of every image as (start, stop) into the columns; image_ids are sorted
+    def image_slices(self):
+        bounds = np.searchsorted(self.image_ids, np.arange(len(self.files) + 1))
+        return np.stack([bounds[:-1], bounds[1:]], axis=1)
+
+    def select(self, mask):
+        return LabelStore(self.files, self.image_ids[mask], self.classes[mask], self.boxes[mask], self.sizes)
+
+    def save(self, path):
+        arrays = {"files": np.asarray(self.files), "image_ids": self.image_ids, "classes": self.classes,
+                  "boxes": self.boxes}
+        if self.sizes is not None:
+            arrays["sizes"] = self.sizes
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        sizes = data["sizes"] if "sizes" in data else None
+        return cls(data["files"].tolist(), data["image_ids"], data["classes"], data["boxes"], sizes)
+
+
+# ------------------------------------
+# YOLO folder -> store
+# ------------------------------------
+def read_image_sizes(image_dir, files, threads=SIZE_READ_THREADS):
+    def size_of(name):
+        with Image.open(os.path.join(image_dir, name)) as img:  # Header only, no decode
+            return img.size
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return np.asarray(list(pool.map(size_of, files)), dtype=np.int32).reshape(-1, 2)
+
+
+def load_yolo_labels(image_dir, label_dir, with_sizes=False):
+    files = sorted(e.name for e in os.scandir(image_dir) if e.name.lower().endswith(image_exts))
+    label_names = {e.name for e in os.scandir(label_dir) if e.name.endswith(".txt")} if os.path.isdir(label_dir) else set()
+
+    # Read every label file, then build the columns in one go; lines that aren't 5 numbers are skipped
+    values = []
+    malformed = []
+    counts = np.zeros(len(files), dtype=np.int64)
+    for image_id, name in enumerate(files):
+        label_name = os.path.splitext(name)[0] + ".txt"
+        if label_name not in label_names:
+            continue
+        with open(os.path.join(label_dir, label_name)) as f:
+            for line_no, line in enumerate(f, 1):
+                row = line.split()
+                if not row:
+                    continue
+                try:
+                    if len(row) != 5:
+                        raise ValueError
+                    parsed = [float(token) for token in row]  # Whole line first, a bad token adds nothing
+                except ValueError:
+                    malformed.append(f"{label_name}:{line_no}")
+                    continue
+                values.extend(parsed)
+                counts[image_id] += 1
+
+    if malformed:
+        shown = ", ".join(malformed[:MALFORMED_SHOWN]) + (", ..." if len(malformed) > MALFORMED_SHOWN else "")
+        print(f"⚠️ Skipped {len(malformed)} malformed label lines in {label_dir}: {shown}")
+    rows = np.asarray(values, dtype=np.float64).reshape(-1, 5)
+    image_ids = np.repeat(np.arange(len(files)), counts)
+    sizes = read_image_sizes(image_dir, files) if with_sizes else None
+    return LabelStore(files, image_ids, rows[:, 0].astype(np.int16), rows[:, 1:], sizes)
+
+
+def load_split(dataset_dir=DATASET_DIR, split="train", with_sizes=False):
+    return load_yolo_labels(os.path.join(dataset_dir, "images", split),
+                            os.path.join(dataset_dir, "labels", split), with_sizes)
+
+
+# ------------------------------------
+# Store -> YOLO folder, one write per image
+# ------------------------------------
+def write_yolo_labels(store, label_dir, write_empty=False):
+    os.makedirs(label_dir, exist_ok=True)
+    lines = [f"{c} {x:.6f} {y:.6f} {w:.6f} {h:.6f}"
+             for c, (x, y, w, h) in zip(store.classes.tolist(), store.boxes.tolist())]
+    written = 0
+    for name, (start, stop) in zip(store.files, store.image_slices().tolist()):
+        label_path = os.path.join(label_dir, os.path.splitext(name)[0] + ".txt")
+        if start == stop and not write_empty:
+            if os.path.exists(label_path):
+                os.remove(label_path)
+            continue
+        with open(label_path, "w") as f:
+            f.write("\n".join(lines[start:stop]))
+        written += 1
+    return written
+
+
+# Images of a split into another dataset folder: hardlinks, copies across filesystems
+def link_images(files, image_dir, output_image_dir):
+    os.makedirs(output_image_dir, exist_ok=True)
+    counts = {"linked": 0, "copied": 0, "unchanged": 0}
+    for name in files:
+        src = os.path.join(image_dir, name)
+        dst = os.path.join(output_image_dir, name)
+        if os.path.exists(dst):
+            src_stat, dst_stat = os.stat(src), os.stat(dst)
+            if (src_stat.st_ino, src_stat.st_dev) == (dst_stat.st_ino, dst_stat.st_dev) or \
+                    (dst_stat.st_size == src_stat.st_size and dst_stat.st_mtime_ns >= src_stat.st_mtime_ns):
+                counts["unchanged"] += 1
+                continue
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+            counts["linked"] += 1
+        except OSError:
+            shutil.copy2(src, dst)  # Different filesystem or no hardlink support
+            counts["copied"] += 1
+    return counts
+
+
+# data.yaml for ultralytics, same layout as dataset_splitting.py writes
+def write_data_yaml(output_dir, names):
+    names_list = ", ".join(f"'{name}'" for name in names)
+    with open(os.path.join(output_dir, "data.yaml"), "w") as f:
+        f.write(f"train: images/train\nval: images/val\nnc: {len(names)}\nnames: [{names_list}]\n")
+
+
+# ------------------------------------
+# Statistics per class, all from bincount
+# ------------------------------------
+def class_stats(store, names):
+    n = len(names)
+    classes = store.classes.astype(np.int64)
+    valid = (classes >= 0) & (classes < n)
+    classes = classes[valid]
+    boxes = store.boxes[valid].astype(np.float64)
+
+    counts = np.bincount(classes, minlength=n)
+    # Distinct images per class: bincount over unique (image, class) pairs
+    pairs = np.unique(store.image_ids[valid].astype(np.int64) * n + classes)
+    images = np.bincount(pairs % n, minlength=n)
+    safe = np.maximum(counts, 1)
+    mean_w = np.bincount(classes, boxes[:, 2], minlength=n) / safe
+    mean_h = np.bincount(classes, boxes[:, 3], minlength=n) / safe
+    mean_area = np.bincount(classes, boxes[:, 2] * boxes[:, 3], minlength=n) / safe
+
+    return {
+        "images": len(store.files),
+        "boxes": len(store),
+        "unlabeled_images": int(len(store.files) - len(np.unique(store.image_ids))),
+        "invalid_class_boxes": int((~valid).sum()),
+        "classes": {
+            name: {"boxes": int(counts[i]), "images": int(images[i]), "mean_w": round(float(mean_w[i]), 4),
+                   "mean_h": round(float(mean_h[i]), 4), "mean_area": round(float(mean_area[i]), 4)}
+            for i, name in enumerate(names)
+        },
+    }
+
+
+# ------------------------------------
+# Class remapping between the 26-class ASL map and the 39-class combined map
+# ------------------------------------
+# Lookup table old id -> new id (-1 where the class does not exist in the target map)
+def remap_table(src_names, dst_names):
+    index = {name: i for i, name in enumerate(dst_names)}
+    return np.asarray([index.get(name, -1) for name in src_names], dtype=np.int16)
+
+
+def remap_classes(store, src_names, dst_names):
+    table = remap_table(src_names, dst_names)
+    classes = store.classes.astype(np.int64)
+    in_range = (classes >= 0) & (classes < len(table))
+    new_classes = np.full(len(classes), -1, dtype=np.int16)
+    new_classes[in_range] = table[classes[in_range]]
+    keep = new_classes >= 0  # Boxes of classes the target map doesn't have are dropped
+    remapped = store.select(keep)
+    remapped.classes = new_classes[keep]
+    return remapped, int((~keep).sum())
+
+
+# ------------------------------------
+# COCO JSON export / import (COCO ids start at 1, bbox is [x, y, w, h] in pixels)
+# ------------------------------------
+def to_coco(store, names):
+    if store.sizes is None:
+        raise ValueError("COCO export needs image sizes: load the labels with with_sizes=True")
+
+    wh = store.sizes[store.image_ids].astype(np.float64)
+    cx, cy, w, h = store.boxes.astype(np.float64).T
+    bbox = np.stack([(cx - w / 2) * wh[:, 0], (cy - h / 2) * wh[:, 1], w * wh[:, 0], h * wh[:, 1]], axis=1)
+    bbox = np.round(bbox, 2)
+    area = np.round(bbox[:, 2] * bbox[:, 3], 2)
+
+    return {
+        "images": [{"id": i + 1, "file_name": name, "width": int(width), "height": int(height)}
+                   for i, (name, (width, height)) in enumerate(zip(store.files, store.sizes.tolist()))],
+        "annotations": [{"id": k + 1, "image_id": image_id + 1, "category_id": class_id + 1, "bbox": box,
+                         "area": a, "iscrowd": 0}
+                        for k, (image_id, class_id, box, a) in enumerate(zip(
+                            store.image_ids.tolist(), store.classes.tolist(), bbox.tolist(), area.tolist()))],
+        "categories": [{"id": i + 1, "name": name} for i, name in enumerate(names)],
+    }
+
+
+def from_coco(coco, names=None):
+    images = sorted(coco["images"], key=lambda img: img["file_name"])
+    position = {img["id"]: i for i, img in enumerate(images)}
+    sizes = np.asarray([(img["width"], img["height"]) for img in images], dtype=np.int32).reshape(-1, 2)
+
+    # Categories are matched by name when a class map is given, otherwise by id order
+    categories = sorted(coco["categories"], key=lambda c: c["id"])
+    if names is not None:
+        index = {name: i for i, name in enumerate(names)}
+        category_class = {c["id"]: index.get(c["name"], -1) for c in categories}
+    else:
+        category_class = {c["id"]: i for i, c in enumerate(categories)}
+
+    annotations = coco["annotations"]
+    image_ids = np.asarray([position[a["image_id"]] for a in annotations], dtype=np.int64)
+    classes = np.asarray([category_class.get(a["category_id"], -1) for a in annotations], dtype=np.int64)
+    bbox = np.asarray([a["bbox"] for a in annotations], dtype=np.float64).reshape(-1, 4)
+
+    wh = sizes[image_ids].astype(np.float64)
+    boxes = np.stack([(bbox[:, 0] + bbox[:, 2] / 2) / wh[:, 0], (bbox[:, 1] + bbox[:, 3] / 2) / wh[:, 1],
+                      bbox[:, 2] / wh[:, 0], bbox[:, 3] / wh[:, 1]], axis=1)
+
+    keep = classes >= 0
+    order = np.argsort(image_ids[keep], kind="stable")
+    return LabelStore([img["file_name"] for img in images], image_ids[keep][order], classes[keep][order],
+                      boxes[keep][order], sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar YOLO label tools: stats, class remapping, COCO conversion")
+    parser.add_argument("--dataset", default=DATASET_DIR, help="YOLO dataset with images/<split> and labels/<split>")
+    parser.add_argument("--split", default="train")
+    parser.add_argument("--names", choices=CLASS_MAPS, default="combined", help="Class map of the labels")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    stats = sub.add_parser("stats")
+    stats.add_argument("--output", help="Also write the statistics as JSON")
+
+    to_coco_cmd = sub.add_parser("to-coco")
+    to_coco_cmd.add_argument("--output", required=True)
+
+    from_coco_cmd = sub.add_parser("from-coco")
+    from_coco_cmd.add_argument("--input", required=True)
+    from_coco_cmd.add_argument("--labels", help="Label folder to write (default: <dataset>/labels/<split>)")
+
+    remap = sub.add_parser("remap")
+    remap.add_argument("--to", choices=CLASS_MAPS, required=True)
+    remap.add_argument("--output", required=True,
+                       help="Dataset folder for the remapped split: images/<split> (hardlinked), labels/<split>, data.yaml")
+
+    args = parser.parse_args()
+    names = CLASS_MAPS[args.names]
+
+    if args.command == "stats":
+        result = class_stats(load_split(args.dataset, args.split), names)
+        print(f"📊 {args.split}: {result['images']} images | {result['boxes']} boxes | "
+              f"Unlabeled: {result['unlabeled_images']} | Unknown class: {result['invalid_class_boxes']}")
+        for name, row in result["classes"].items():
+            print(f"  {name:<8} boxes: {row['boxes']:<6} images: {row['images']:<6} "
+                  f"mean w/h: {row['mean_w']:.3f}/{row['mean_h']:.3f}")
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(result, f, indent=2)
+
+    elif args.command == "to-coco":
+        coco = to_coco(load_split(args.dataset, args.split, with_sizes=True), names)
+        with open(args.output, "w") as f:
+            json.dump(coco, f)
+        print(f"✅ {len(coco['images'])} images, {len(coco['annotations'])} boxes -> {args.output}")
+
+    elif args.command == "from-coco":
+        with open(args.input) as f:
+            store = from_coco(json.load(f), names)
+        label_dir = args.labels or os.path.join(args.dataset, "labels", args.split)
+        written = write_yolo_labels(store, label_dir)
+        print(f"✅ {written} label files written to {label_dir}")
+
+    else:
+        if os.path.abspath(args.output) == os.path.abspath(args.dataset):
+            parser.error("--output must be a different folder than --dataset")
+        store, dropped = remap_classes(load_split(args.dataset, args.split), names, CLASS_MAPS[args.to])
+        # A full dataset, not just labels: images are hardlinked so ultralytics can train on it as is
+        images = link_images(store.files, os.path.join(args.dataset, "images", args.split),
+                             os.path.join(args.output, "images", args.split))
+        label_dir = os.path.join(args.output, "labels", args.split)
+        written = write_yolo_labels(store, label_dir)
+        write_data_yaml(args.output, CLASS_MAPS[args.to])
+        print(f"✅ {written} label files written to {label_dir} | Boxes without a {args.to} class dropped: {dropped}")
+        print(f"📊 Images linked: {images['linked']} | Copied: {images['copied']} | Unchanged: {images['unchanged']} | "
+              f"data.yaml written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
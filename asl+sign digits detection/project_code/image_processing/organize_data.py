@@ -0,0 +1,273 @@
+import os
+import re
+import shutil
+import argparse
+from multiprocessing import Pool
+import numpy as np
+import cv2
+from tqdm import tqdm
+
+# ------------------------------------
+# Near-duplicate removal for yolo_images
+# ------------------------------------
+# The ASL alphabet set is thousands of consecutive video frames per class, most of them nearly identical.
+# Run this after image_extraction.py and before bounding_box_generation.py:
+#
+#   1. every image gets a 64-bit difference hash (dHash), computed in parallel
+#   2. per class, images are visited in natural name order (frame_9 before frame_10, = frame order) and
+#      looked up in a BK-tree of the images already kept; one within --threshold bits of a kept image
+#      joins that image's cluster
+#   3. each cluster keeps its first --keep images; the rest are moved (with their .txt, if any) to
+#      data/duplicates/<class>, so nothing is lost
+#
+# Hashes and cluster ids of kept images are stored in data/phash_index.npz. On the next run only new or
+# changed files are hashed and clustered against the kept ones, so adding images is incremental.
+#
+#   python image_processing/organize_data.py --threshold 5 --keep 1 --dry-run
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGE_DIR = os.path.join(BASE_DIR, "data", "yolo_images")
+DUPLICATE_DIR = os.path.join(BASE_DIR, "data", "duplicates")
+INDEX_PATH = os.path.join(BASE_DIR, "data", "phash_index.npz")
+
+image_exts = ('.jpg', '.jpeg', '.png')
+AUGMENTED_TAG = "_aug"  # Augmented copies are left alone, same tag as data_augmentation.py
+AUGMENTED_SUFFIX = re.compile(re.escape(AUGMENTED_TAG) + r"\d+$")  # <stem>_aug<k>
+THRESHOLD = 5  # Max Hamming distance (of 64 bits) between near-duplicates
+KEEP = 1  # Images kept per cluster
+CHUNK_SIZE = 256  # Images hashed per work item
+
+
+# ------------------------------------
+# Perceptual hash: 9x8 grayscale thumbnail, one bit per "left pixel brighter than right"
+# ------------------------------------
+def dhash(image_path):
+    # The decoder downscales while reading, we only need a thumbnail
+    gray = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if gray is None:
+        return None
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hash_chunk(paths):
+    return [(path, dhash(path)) for path in paths]
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+# ------------------------------------
+# BK-tree over 64-bit hashes: children keyed by their distance to the node, so a radius query only
+# descends into children whose key is within radius of the query's own distance
+# ------------------------------------
+class BKTree:
+    def __init__(self):
+        self.root = None  # [hash, item, {distance: child}]
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = [value, item, {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(value, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, item, {}]
+                return
+            node = child
+
+    # Closest (distance, item) within radius, or None
+    def nearest(self, value, radius):
+        best = None
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            d = hamming(value, node[0])
+            if d <= radius and (best is None or d < best[0]):
+                best = (d, node[1])
+            for key, child in node[2].items():
+                if d - radius <= key <= d + radius:
+                    stack.append(child)
+        return best
+
+
+# ------------------------------------
+# Persistent index of kept images: relative path, size, mtime, hash, cluster id
+# ------------------------------------
+def load_index(index_path):
+    if not os.path.exists(index_path):
+        return {}
+    with np.load(index_path) as data:
+        return {str(path): (int(size), int(mtime), int(h), int(cluster))
+                for path, size, mtime, h, cluster in zip(data["paths"], data["sizes"], data["mtimes"],
+                                                         data["hashes"], data["clusters"])}
+
+
+def save_index(index_path, index):
+    paths = sorted(index)
+    rows = np.asarray([index[p] for p in paths], dtype=np.uint64).reshape(-1, 4)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, paths=np.array(paths, dtype=str), sizes=rows[:, 0].astype(np.int64),
+                 mtimes=rows[:, 1].astype(np.int64), hashes=rows[:, 2], clusters=rows[:, 3].astype(np.int64))
+    os.replace(tmp_path, index_path)
+
+
+# Digit runs compare as numbers, so frame_9.jpg sorts before frame_10.jpg (split() alternates text and digits,
+# so the same positions always hold the same type)
+def natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def scan_class(class_path):
+    files = {}
+    for entry in os.scandir(class_path):
+        if entry.is_file() and entry.name.lower().endswith(image_exts) \
+                and not AUGMENTED_SUFFIX.search(os.path.splitext(entry.name)[0]):
+            stat = entry.stat()
+            files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+# ------------------------------------
+# Cluster one class: kept images from the index seed the tree, new images are matched against it
+# ------------------------------------
+def cluster_class(class_folder, files, hashes, index, threshold, keep):
+    tree = BKTree()
+    kept_per_cluster = {}
+    next_cluster = 0
+    kept = {}
+    duplicates = []
+
+    for name in sorted(files, key=natural_key):
+        rel = f"{class_folder}/{name}"
+        entry = index.get(rel)
+        if entry is not None and entry[:2] == files[name]:
+            _, _, h, cluster = entry
+            tree.add(h, cluster)
+            kept_per_cluster[cluster] = kept_per_cluster.get(cluster, 0) + 1
+            next_cluster = max(next_cluster, cluster + 1)
+            kept[rel] = entry
+
+    for name in sorted(files, key=natural_key):
+        rel = f"{class_folder}/{name}"
+        if rel in kept:
+            continue
+        h = hashes.get(rel)
+        if h is None:
+            continue  # Unreadable, left in place
+
+        match = tree.nearest(h, threshold)
+        if match is not None and kept_per_cluster[match[1]] >= keep:
+            duplicates.append(name)
+            continue
+        cluster = match[1] if match is not None else next_cluster
+        if match is None:
+            next_cluster += 1
+        tree.add(h, cluster)
+        kept_per_cluster[cluster] = kept_per_cluster.get(cluster, 0) + 1
+        kept[rel] = files[name] + (h, cluster)
+
+    return kept, duplicates, len(kept_per_cluster)
+
+
+def move_duplicate(class_path, name, duplicate_dir):
+    os.makedirs(duplicate_dir, exist_ok=True)
+    for file_name in (name, os.path.splitext(name)[0] + ".txt"):
+        src = os.path.join(class_path, file_name)
+        if os.path.exists(src):
+            shutil.move(src, os.path.join(duplicate_dir, file_name))
+
+
+def organize_dataset(image_dir=IMAGE_DIR, duplicate_dir=DUPLICATE_DIR, index_path=INDEX_PATH,
+                     threshold=THRESHOLD, keep=KEEP, workers=1, dry_run=False, rebuild=False):
+    index = load_index(index_path)
+    hashes = {}
+
+    classes = {}
+    to_hash = []
+    for class_folder in sorted(os.listdir(image_dir)):
+        class_path = os.path.join(image_dir, class_folder)
+        if not os.path.isdir(class_path):
+            continue
+        files = scan_class(class_path)
+        classes[class_folder] = files
+        for name, stat in files.items():
+            entry = index.get(f"{class_folder}/{name}")
+            if entry is None or entry[:2] != stat:
+                to_hash.append(os.path.join(class_path, name))
+            elif rebuild:
+                hashes[f"{class_folder}/{name}"] = entry[2]  # Re-clustered, but the hash is still good
+
+    if rebuild:
+        index = {}  # Forget the old clusters, e.g. after changing --threshold or --keep
+
+    # Hash only new or changed files
+    hashed = len(hashes)
+    chunks = [to_hash[i:i + CHUNK_SIZE] for i in range(0, len(to_hash), CHUNK_SIZE)]
+    pool = Pool(processes=workers) if workers > 1 and len(chunks) > 1 else None
+    results = pool.imap_unordered(hash_chunk, chunks) if pool else map(hash_chunk, chunks)
+    try:
+        with tqdm(total=len(to_hash), desc="🔑 Hashing images") as progress:
+            for chunk_result in results:
+                for path, h in chunk_result:
+                    if h is None:
+                        print(f"❌ Failed to load image: {path}")
+                    else:
+                        hashes[os.path.relpath(path, image_dir).replace(os.sep, "/")] = h
+                progress.update(len(chunk_result))
+    except BaseException:
+        if pool is not None:
+            pool.terminate()  # Workers killed by Ctrl-C never send their results, join() would wait forever
+        raise
+    else:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    new_index = {}
+    total_before = total_after = 0
+    for class_folder, files in classes.items():
+        kept, duplicates, clusters = cluster_class(class_folder, files, hashes, index, threshold, keep)
+        new_index.update(kept)
+        total_before += len(files)
+        total_after += len(files) - len(duplicates)
+        if duplicates:
+            print(f"📁 {class_folder:<10} | Images: {len(files):<6} | Clusters: {clusters:<6} | "
+                  f"Duplicates: {len(duplicates)}")
+        if not dry_run:
+            for name in duplicates:
+                move_duplicate(os.path.join(image_dir, class_folder), name, os.path.join(duplicate_dir, class_folder))
+
+    if not dry_run:
+        save_index(index_path, new_index)
+
+    removed = total_before - total_after
+    shrink = 100 * removed / total_before if total_before else 0
+    action = "Would move" if dry_run else "Moved"
+    print(f"📊 Images: {total_before} -> {total_after} | {action} {removed} near-duplicates "
+          f"({shrink:.1f}% smaller) | Hashed this run: {len(hashes) - hashed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move near-duplicate frames out of yolo_images using perceptual hashes")
+    parser.add_argument("--image-dir", default=IMAGE_DIR)
+    parser.add_argument("--duplicates", default=DUPLICATE_DIR, help="Where near-duplicates are moved to")
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument("--threshold", type=int, default=THRESHOLD, help="Max Hamming distance of near-duplicates")
+    parser.add_argument("--keep", type=int, default=KEEP, help="Images kept per cluster")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = serial)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be moved")
+    parser.add_argument("--rebuild", action="store_true", help="Re-cluster every image (stored hashes are reused)")
+    args = parser.parse_args()
+
+    organize_dataset(args.image_dir, args.duplicates, args.index, args.threshold, args.keep, args.workers,
+                     args.dry_run, args.rebuild)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import os
+import argparse
+from multiprocessing import Pool
+import numpy as np
+import cv2
+from PIL import Image
+from tqdm import tqdm
+
+# ------------------------------------
+# Letterbox resize of yolo_images for a training size
+# ------------------------------------
+# data/yolo_images/<class> -> data/yolo_images_<size>/<class>. Every image is scaled to fit size x size
+# with its aspect ratio kept (INTER_AREA when shrinking) and padded with YOLO's gray, the same geometry
+# detection_backends.letterbox uses at inference. YOLO labels next to the images are moved onto the
+# padded geometry. Outputs at least as new as their sources are skipped, so a rerun, or a new size,
+# only costs the files that changed.
+#
+#   python image_processing/resize_images.py --size 320
+#   python dataset_splitting.py --source data/yolo_images_320
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGE_DIR = os.path.join(BASE_DIR, "data", "yolo_images")
+
+image_exts = ('.jpg', '.jpeg', '.png')
+IMG_SIZE = 416  # Same size the models are trained at
+PAD_VALUE = 114
+CHUNK_SIZE = 64  # Files per work item sent to a worker process
+
+
+def default_output_dir(size):
+    return os.path.join(BASE_DIR, "data", f"yolo_images_{size}")
+
+
+# ------------------------------------
+# Letterbox geometry: scaled size and padding of a w x h image in a size x size square
+# ------------------------------------
+def letterbox_geometry(w, h, size):
+    ratio = min(size / h, size / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    left = int(round((size - new_w) / 2 - 0.1))
+    top = int(round((size - new_h) / 2 - 0.1))
+    return new_w, new_h, left, top
+
+
+def letterbox_image(image, size):
+    h, w = image.shape[:2]
+    new_w, new_h, left, top = letterbox_geometry(w, h, size)
+    if (new_w, new_h) != (w, h):
+        interpolation = cv2.INTER_AREA if new_w < w else cv2.INTER_LINEAR
+        image = cv2.resize(image, (new_w, new_h), interpolation=interpolation)
+    return cv2.copyMakeBorder(image, top, size - new_h - top, left, size - new_w - left,
+                              cv2.BORDER_CONSTANT, value=(PAD_VALUE,) * 3)
+
+
+# (k, 5) YOLO rows of a w x h image -> the same boxes in the letterboxed image
+def letterbox_labels(rows, w, h, size):
+    new_w, new_h, left, top = letterbox_geometry(w, h, size)
+    out = rows.copy()
+    out[:, 1] = (rows[:, 1] * new_w + left) / size
+    out[:, 2] = (rows[:, 2] * new_h + top) / size
+    out[:, 3] = rows[:, 3] * new_w / size
+    out[:, 4] = rows[:, 4] * new_h / size
+    return out
+
+
+def read_label_rows(label_path):
+    with open(label_path) as f:
+        rows = [line.split() for line in f if line.strip()]
+    return np.asarray([r for r in rows if len(r) == 5], dtype=np.float64).reshape(-1, 5)
+
+
+def format_label_rows(rows):
+    return "\n".join(f"{int(c)} {x:.6f} {y:.6f} {w:.6f} {h:.6f}" for c, x, y, w, h in rows)
+
+
+# ------------------------------------
+# Work item: a chunk of (src image, dst image, src label or None, dst label, redo image, redo label)
+# ------------------------------------
+def resize_chunk(chunk):
+    size, items = chunk
+    resized = relabeled = 0
+    errors = []
+    for src_image, dst_image, src_label, dst_label, redo_image, redo_label in items:
+        if redo_image:
+            image = cv2.imread(src_image, cv2.IMREAD_COLOR)
+            if image is None:
+                errors.append(src_image)
+                continue
+            h, w = image.shape[:2]
+            tmp_file = dst_image + ".tmp" + os.path.splitext(dst_image)[1]
+            cv2.imwrite(tmp_file, letterbox_image(image, size))
+            os.replace(tmp_file, dst_image)  # A half-written file never looks up to date
+            resized += 1
+        elif redo_label:
+            with Image.open(src_image) as img:  # Header only, no decode
+                w, h = img.size
+
+        if redo_label:
+            with open(dst_label, "w") as f:
+                f.write(format_label_rows(letterbox_labels(read_label_rows(src_label), w, h, size)))
+            relabeled += 1
+    return len(items), resized, relabeled, errors
+
+
+# ------------------------------------
+# Plan one class folder from one scandir of the source and one of the output
+# ------------------------------------
+def mtimes(folder):
+    if not os.path.isdir(folder):
+        return {}
+    return {entry.name: entry.stat().st_mtime_ns for entry in os.scandir(folder) if entry.is_file()}
+
+
+def plan_class(src_folder, dst_folder, force=False):
+    src = mtimes(src_folder)
+    dst = mtimes(dst_folder)
+
+    items = []
+    expected = set()
+    for name in sorted(src):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in image_exts:
+            continue
+        label_name = stem + ".txt"
+        has_label = label_name in src
+        expected.add(name)
+        if has_label:
+            expected.add(label_name)
+
+        redo_image = force or dst.get(name, -1) < src[name]
+        redo_label = has_label and (redo_image or dst.get(label_name, -1) < src[label_name])
+        if redo_image or redo_label:
+            items.append((os.path.join(src_folder, name), os.path.join(dst_folder, name),
+                          os.path.join(src_folder, label_name) if has_label else None,
+                          os.path.join(dst_folder, label_name), redo_image, redo_label))
+
+    # Outputs whose source is gone, including labels deleted upstream (e.g. no hand found any more)
+    stale = [os.path.join(dst_folder, name) for name in dst if name not in expected]
+    image_count = sum(1 for name in src if name.lower().endswith(image_exts))
+    return items, stale, image_count
+
+
+def resize_dataset(image_dir=IMAGE_DIR, output_dir=None, size=IMG_SIZE, workers=1, chunk_size=CHUNK_SIZE,
+                   force=False):
+    output_dir = output_dir or default_output_dir(size)
+    chunks = []
+    removed = 0
+    up_to_date = 0
+    for class_folder in sorted(os.listdir(image_dir)):
+        src_folder = os.path.join(image_dir, class_folder)
+        if not os.path.isdir(src_folder):
+            continue
+        dst_folder = os.path.join(output_dir, class_folder)
+        os.makedirs(dst_folder, exist_ok=True)
+
+        items, stale, image_count = plan_class(src_folder, dst_folder, force)
+        for path in stale:
+            os.remove(path)
+        removed += len(stale)
+        up_to_date += image_count - len(items)
+        for start in range(0, len(items), chunk_size):
+            chunks.append((size, items[start:start + chunk_size]))
+
+    resized = relabeled = 0
+    errors = []
+    total = sum(len(items) for _, items in chunks)
+    pool = Pool(processes=workers) if workers > 1 and len(chunks) > 1 else None
+    results = pool.imap_unordered(resize_chunk, chunks) if pool else map(resize_chunk, chunks)
+    try:
+        with tqdm(total=total, desc=f"📐 Letterboxing to {size}x{size}") as progress:
+            for done, chunk_resized, chunk_relabeled, chunk_errors in results:
+                resized += chunk_resized
+                relabeled += chunk_relabeled
+                errors.extend(chunk_errors)
+                progress.update(done)
+    except BaseException:
+        if pool is not None:
+            pool.terminate()  # Workers killed by Ctrl-C never send their results, join() would wait forever
+        raise
+    else:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    for path in errors:
+        print(f"❌ Failed to load image: {path}")
+    print(f"📊 Resized: {resized} | Labels rewritten: {relabeled} | Up to date: {up_to_date} | "
+          f"Removed: {removed} | Failed: {len(errors)}")
+    return output_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Letterbox yolo_images (and their YOLO labels) to a square training size")
+    parser.add_argument("--image-dir", default=IMAGE_DIR)
+    parser.add_argument("--output", help="Output folder (default: data/yolo_images_<size>)")
+    parser.add_argument("--size", type=int, default=IMG_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = serial)")
+    parser.add_argument("--force", action="store_true", help="Redo every file, even if up to date")
+    args = parser.parse_args()
+
+    output_dir = resize_dataset(args.image_dir, args.output, args.size, args.workers, force=args.force)
+    print(f"✅ Letterboxed images saved in {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import cv2
+from detection_backends import BACKENDS, load_backend, warn_if_fixed_batch
+from realtime_detection import MODEL_PATH, draw_detections
+
+# ------------------------------------
+# Offline detection over a recorded video or a folder of images
+# ------------------------------------
+# Frames are decoded on a background thread and sent to the model in batches. Results are streamed as
+# JSON Lines, one line per frame:
+#   {"frame": 0, "file": "A1.jpg", "detections": [{"class": "A", "conf": 0.91, "xyxy": [x1, y1, x2, y2]}]}
+#
+#   python offline_detection.py --source session.mp4 --output session.jsonl --video session_annotated.mp4
+
+BATCH_SIZE = 8
+QUEUE_BATCHES = 4  # Decoded batches buffered ahead of the model
+VIDEO_FPS = 30  # Frame rate of the annotated video when the source is an image folder
+image_exts = ('.jpg', '.jpeg', '.png')
+
+
+# Yields (frame index, file name or None, BGR frame)
+def iter_frames(source):
+    if os.path.isdir(source):
+        files = sorted(f for f in os.listdir(source) if f.lower().endswith(image_exts))
+        for idx, file_name in enumerate(files):
+            frame = cv2.imread(os.path.join(source, file_name))
+            if frame is None:
+                print(f"❌ Failed to load image: {file_name}", file=sys.stderr)
+                continue
+            yield idx, file_name, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video source: {source}")
+    idx = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield idx, None, frame
+        idx += 1
+    cap.release()
+
+
+def source_fps(source):
+    if os.path.isdir(source):
+        return VIDEO_FPS
+    cap = cv2.VideoCapture(source)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    return fps or VIDEO_FPS
+
+
+class DecoderThread(threading.Thread):
+    def __init__(self, source, batch_size, batches):
+        super().__init__(daemon=True)
+        self.source = source
+        self.batch_size = batch_size
+        self.batches = batches
+        self.error = None
+
+    def run(self):
+        batch = []
+        try:
+            for item in iter_frames(self.source):
+                batch.append(item)
+                if len(batch) == self.batch_size:
+                    self.batches.put(batch)  # Blocks when the model falls behind, bounding memory
+                    batch = []
+            if batch:
+                self.batches.put(batch)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.batches.put(None)  # End of stream
+
+
+def detection_records(detections, names):
+    return [{"class": names[cls] if names else str(cls), "conf": round(conf, 4), "xyxy": [x1, y1, x2, y2]}
+            for x1, y1, x2, y2, conf, cls in detections]
+
+
+def frame_record(frame_idx, file_name, detections, names):
+    record = {"frame": frame_idx}
+    if file_name is not None:
+        record["file"] = file_name
+    record["detections"] = detection_records(detections, names)
+    return record
+
+
+def run_offline(model, source, output, batch_size=BATCH_SIZE, imgsz=None, video_path=None):
+    batches = queue.Queue(maxsize=QUEUE_BATCHES)
+    decoder = DecoderThread(source, batch_size, batches)
+    decoder.start()
+
+    out = sys.stdout if output == "-" else open(output, "w")
+    writer = None
+    frames_done = 0
+    detections_done = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            batch = batches.get()
+            if batch is None:
+                break
+
+            frames = [frame for _, _, frame in batch]
+            batch_detections = model.predict_batch(frames, imgsz=imgsz)
+
+            for (frame_idx, file_name, frame), detections in zip(batch, batch_detections):
+                out.write(json.dumps(frame_record(frame_idx, file_name, detections, model.names)) + "\n")
+                detections_done += len(detections)
+
+                if video_path:
+                    if writer is None:
+                        video_h, video_w = frame.shape[:2]
+                        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"mp4v"), source_fps(source),
+                                                 (video_w, video_h))
+                    draw_detections(frame, detections, model.names)
+                    if frame.shape[:2] != (video_h, video_w):
+                        frame = cv2.resize(frame, (video_w, video_h))  # Image folders may mix sizes
+                    writer.write(frame)
+            frames_done += len(batch)
+    finally:
+        # Drain so a decoder blocked on a full queue can finish if we stopped early
+        while decoder.is_alive():
+            try:
+                batches.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        decoder.join()
+        if writer is not None:
+            writer.release()
+        if out is not sys.stdout:
+            out.close()
+
+    if decoder.error:
+        raise decoder.error
+
+    elapsed = time.perf_counter() - start
+    print(f"📊 Frames: {frames_done} | Detections: {detections_done} | "
+          f"Throughput: {frames_done / elapsed if elapsed else 0:.1f} frames/sec", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched sign detection over a video file or image folder")
+    parser.add_argument("--source", required=True, help="Video file or folder of images")
+    parser.add_argument("--output", default="-", help="JSONL output file ('-' for stdout)")
+    parser.add_argument("--video", help="Also write an annotated video to this path")
+    parser.add_argument("--model", default=MODEL_PATH, help="Checkpoint (.pt) or exported .onnx")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--imgsz", type=int, help="Inference size (default: the model's own)")
+    args = parser.parse_args()
+
+    model = load_backend(args.backend, args.model)
+    warn_if_fixed_batch(model, args.batch_size, f"each batch of {args.batch_size}")
+    run_offline(model, args.source, args.output, batch_size=args.batch_size, imgsz=args.imgsz, video_path=args.video)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,870 @@
+import os
+import json
 import cv2
-from ultralytics import YOLO
+import numpy as np
+import argparse
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from detection_backends import BACKENDS, CACHE_DIR, RemoteBackend, load_backend, warn_if_fixed_batch
 
-# Load your trained YOLO model
-model = YOLO("/Users/macbookpro/Desktop/CV-Project/CV-Project/project_code/model/best.pt")
+PROCESS_START = time.perf_counter()  # Startup times are measured from here
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+CONFIG_PATH = os.path.join(BASE_DIR, "realtime_config.json")
+
+
+# Machine-independent settings; relative paths are resolved against the config file's folder
+def load_config(path=CONFIG_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        config = json.load(f)
+    for key in ("model_path", "cache_dir"):
+        if config.get(key):
+            config[key] = os.path.join(os.path.dirname(os.path.abspath(path)), os.path.expanduser(config[key]))
+    return config
+
+
+CONFIG = load_config()
+
+# Load your trained YOLO model (model_path in realtime_config.json)
+MODEL_PATH = CONFIG.get("model_path", os.path.join(BASE_DIR, "model", "best.pt"))
 
 # Open MacBook's webcam
-cap = cv2.VideoCapture(0)  # 0 is the default webcam
+CAMERA_SOURCE = "0"  # 0 is the default webcam; a video file path also works
+
+
+# Webcam index ("0") or video file path
+def open_source(source):
+    return cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+
+
+# Put into a bounded queue, dropping the oldest item when it is full
+def put_latest(q, item):
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+
+# Run YOLO on the frame; every backend returns boxes as (x1, y1, x2, y2, conf, cls)
+def run_model(model, frame, imgsz=None):
+    return model(frame, imgsz=imgsz)
+
+
+# ------------------------------------
+# Startup: camera opened while the model loads, warm-up before the first real frame
+# ------------------------------------
+WARMUP_PASSES = 2
+DEFAULT_FRAME_SHAPE = (480, 640, 3)  # When the source doesn't report its size
+
+
+class StartupTimer:
+    def __init__(self, start=PROCESS_START):
+        self.start = start
+        self.steps = {}
+        self.first_frame_at = None
+
+    # Seconds since process start at which a step finished (the latest one, for steps run per source)
+    def mark(self, step):
+        self.steps[step] = max(self.steps.get(step, 0.0), time.perf_counter() - self.start)
+
+    def first_frame(self):
+        if self.first_frame_at is not None:
+            return
+        self.first_frame_at = time.perf_counter() - self.start
+        steps = " | ".join(f"{step}: {seconds:.2f} s" for step, seconds in self.steps.items())
+        print(f"🚀 {steps} | Time to first frame: {self.first_frame_at:.2f} s")
+
+
+def frame_shape(cap):
+    w, h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    return (h, w, 3) if w and h else DEFAULT_FRAME_SHAPE
+
+
+# Blank frames through the model at every size the loop will use, so lazy setup (layer fusing, memory
+# arenas, kernel selection) is paid before the first real frame instead of on it
+def warm_up(model, shape, sizes=(None,), batch=1, passes=WARMUP_PASSES):
+    frames = [np.full(shape, 114, dtype=np.uint8) for _ in range(batch)]
+    for imgsz in sizes:
+        for _ in range(passes):
+            model.predict_batch(frames, imgsz=imgsz)
+
+
+# Manually draw bounding boxes and labels
+def draw_detections(frame, detections, names):
+    for x1, y1, x2, y2, conf, cls in detections:
+        # Get class name
+        class_name = names[cls] if names else f"Class {cls}"
+
+        # Draw bounding box
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)  # Green box
+
+        # Put label text
+        label = f"{class_name}: {conf:.2f}"
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+
+# ------------------------------------
+# Hand-ROI mode: track the hand cheaply, run YOLO on a small padded crop around it
+# ------------------------------------
+ROI_MARGIN = 0.5  # Crop grows by this fraction of the hand box on every side
+ROI_IMGSZ = 256  # YOLO input size for crops
+ROI_MIN_SIZE = 96  # Smallest crop side in pixels
+
+
+# Square crop around a box, grown by margin and shifted to stay inside the frame
+def expand_box(box, frame_w, frame_h, margin=ROI_MARGIN, min_size=ROI_MIN_SIZE):
+    x1, y1, x2, y2 = box[:4]
+    side = max(x2 - x1, y2 - y1) * (1 + 2 * margin)
+    side = int(min(max(side, min_size), frame_w, frame_h))
+    cx = (x1 + x2) / 2
+    cy = (y1 + y2) / 2
+    left = int(min(max(cx - side / 2, 0), frame_w - side))
+    top = int(min(max(cy - side / 2, 0), frame_h - side))
+    return left, top, left + side, top + side
+
+
+# MediaPipe Hands in video (tracking) mode on a downscaled frame; returns the hand box in frame pixels
+class MediaPipeHandTracker:
+    def __init__(self, scale=0.5):
+        import mediapipe as mp  # Only needed for this tracker
+        self.hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=1)
+        self.scale = scale
+
+    def __call__(self, frame):
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (int(w * self.scale), int(h * self.scale)), interpolation=cv2.INTER_AREA)
+        results = self.hands.process(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+        if not results.multi_hand_landmarks:
+            return None
+
+        xs = [lm.x * w for lm in results.multi_hand_landmarks[0].landmark]
+        ys = [lm.y * h for lm in results.multi_hand_landmarks[0].landmark]
+        return min(xs), min(ys), max(xs), max(ys)
+
+
+class RoiDetector:
+    def __init__(self, model, tracker="yolo", margin=ROI_MARGIN, imgsz=ROI_IMGSZ):
+        self.model = model
+        self.hand_tracker = MediaPipeHandTracker() if tracker == "mediapipe" else None
+        self.margin = margin
+        self.imgsz = imgsz
+        self.last_box = None  # Previous YOLO box, used as the track when there is no MediaPipe tracker
+        self.roi_frames = 0
+        self.full_frames = 0
+
+    def __call__(self, frame):
+        frame_h, frame_w = frame.shape[:2]
+        hand_box = self.hand_tracker(frame) if self.hand_tracker else self.last_box
+
+        detections = []
+        if hand_box is not None:
+            x1, y1, x2, y2 = expand_box(hand_box, frame_w, frame_h, self.margin)
+            crop_detections = run_model(self.model, frame[y1:y2, x1:x2], imgsz=self.imgsz)
+            # Map crop boxes back to frame coordinates
+            detections = [(bx1 + x1, by1 + y1, bx2 + x1, by2 + y1, conf, cls)
+                          for bx1, by1, bx2, by2, conf, cls in crop_detections]
+            self.roi_frames += 1
+
+        # Track lost (or never found): fall back to the full frame
+        if not detections:
+            detections = run_model(self.model, frame)
+            self.full_frames += 1
+
+        self.last_box = max(detections, key=lambda d: d[4]) if detections else None
+        return detections
+
+
+# ------------------------------------
+# Motion gating: skip YOLO while the scene is static and reuse the last detections
+# ------------------------------------
+MOTION_THRESHOLD = 2.0  # Mean absolute gray-level difference (0–255) that counts as motion
+MOTION_MAX_SKIP = 15  # Always run YOLO after this many reused frames
+MOTION_SIZE = (64, 48)  # Downsampled frame used for the difference score
+
+
+class MotionGatedDetector:
+    def __init__(self, detect, threshold=MOTION_THRESHOLD, max_skip=MOTION_MAX_SKIP):
+        self.detect = detect
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.reference = None  # Small gray frame from the last real inference
+        self.last_detections = None
+        self.skipped_in_row = 0
+        self.inferences = 0
+        self.saved = 0
+
+    def motion_score(self, small):
+        if self.reference is None:
+            return float("inf")
+        return float(np.mean(cv2.absdiff(small, self.reference)))
+
+    def __call__(self, frame):
+        small = cv2.cvtColor(cv2.resize(frame, MOTION_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+
+        # Compare against the last inferred frame, not the previous one, so slow drift still triggers YOLO
+        if self.motion_score(small) < self.threshold and self.skipped_in_row < self.max_skip:
+            self.skipped_in_row += 1
+            self.saved += 1
+            return self.last_detections
+
+        self.last_detections = self.detect(frame)
+        self.reference = small
+        self.skipped_in_row = 0
+        self.inferences += 1
+        return self.last_detections
+
+
+# ------------------------------------
+# Adaptive resolution: keep inference within a latency budget by moving along a ladder of input sizes
+# ------------------------------------
+RESOLUTION_LADDER = [224, 320, 416]  # 416 is the training size (aslyolotrianing.ipynb)
+RESOLUTION_WINDOW = 15  # Inferences averaged before a decision; the window restarts after every change
+UPSCALE_HEADROOM = 0.7  # Step up only if the larger size is predicted to use at most this much of the budget
+
+
+class AdaptiveResolution:
+    def __init__(self, model, budget_ms, ladder=RESOLUTION_LADDER, window=RESOLUTION_WINDOW,
+                 headroom=UPSCALE_HEADROOM):
+        self.model = model
+        self.budget = budget_ms / 1000
+        self.ladder = sorted(ladder)
+        self.level = len(self.ladder) - 1  # Start at full size and step down only if needed
+        self.headroom = headroom
+        self.times = deque(maxlen=window)
+        self.hits = 0
+        self.frames = 0
+        self.frames_per_size = {size: 0 for size in self.ladder}
+
+    @property
+    def imgsz(self):
+        return self.ladder[self.level]
+
+    def hit_rate(self):
+        return self.hits / self.frames if self.frames else 0.0
+
+    def __call__(self, frame):
+        start = time.perf_counter()
+        detections = run_model(self.model, frame, imgsz=self.imgsz)
+        seconds = time.perf_counter() - start
+
+        self.frames += 1
+        self.hits += seconds <= self.budget
+        self.frames_per_size[self.imgsz] += 1
+        self.times.append(seconds)
+        if len(self.times) == self.times.maxlen:
+            self.adjust(sum(self.times) / len(self.times))
+        return detections
+
+    def adjust(self, mean):
+        level = self.level
+        if mean > self.budget and level > 0:
+            level -= 1
+        elif level < len(self.ladder) - 1:
+            # Inference time grows roughly with the pixel count
+            predicted = mean * (self.ladder[level + 1] / self.ladder[level]) ** 2
+            if predicted <= self.budget * self.headroom:
+                level += 1
+        if level != self.level:
+            print(f"🎚️ Inference size {self.imgsz} -> {self.ladder[level]} | Mean: {mean * 1000:.1f} ms | "
+                  f"Budget: {self.budget * 1000:.0f} ms | Hit rate: {self.hit_rate():.0%}")
+            self.level = level
+            self.times.clear()
+
+    def print_summary(self):
+        sizes = " | ".join(f"{size}: {count}" for size, count in self.frames_per_size.items() if count)
+        print(f"🎚️ Budget: {self.budget * 1000:.0f} ms | Hit rate: {self.hit_rate():.0%} of {self.frames} inferences | "
+              f"Final size: {self.imgsz} | Frames per size: {sizes}")
+
+
+# ------------------------------------
+# Latency instrumentation: rolling per-stage timings, optional on-frame overlay and periodic dump
+# ------------------------------------
+# Disabled unless --stats/--stats-overlay/--stats-dump is given; the loops then only pay an "if stats" check.
+STATS_WINDOW = 300  # Samples kept per stage, about 10 s at 30 FPS
+STATS_DUMP_INTERVAL = 5.0  # Seconds between dumps
+STAGES = ["capture", "queue", "inference", "draw", "display", "end_to_end"]
+
+
+class LatencyStats:
+    def __init__(self, window=STATS_WINDOW, dump_path=None, dump_interval=STATS_DUMP_INTERVAL, overlay=False):
+        # deque.append is atomic, so the capture and inference threads can add samples without a lock
+        self.window = window
+        self.samples = {stage: deque(maxlen=window) for stage in STAGES}
+        self.frame_times = deque(maxlen=window)
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.overlay = overlay
+        self.last_dump = time.perf_counter()
+        self.frames = 0
+
+    def add(self, stage, seconds):
+        self.samples[stage].append(seconds)
+
+    # Called once per displayed frame
+    def frame_done(self):
+        now = time.perf_counter()
+        self.frame_times.append(now)
+        self.frames += 1
+        if self.dump_path and now - self.last_dump >= self.dump_interval:
+            self.dump(self.dump_path)
+            self.last_dump = now
+
+    def fps(self):
+        times = list(self.frame_times)
+        if len(times) < 2 or times[-1] == times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    # {stage: {"p50", "p95", "p99", "mean" (ms), "count"}} over the rolling window
+    def summary(self):
+        rows = {}
+        for stage, samples in self.samples.items():
+            values = np.asarray(list(samples), dtype=np.float64) * 1000
+            if len(values):
+                p50, p95, p99 = np.percentile(values, [50, 95, 99])
+                rows[stage] = {"p50": p50, "p95": p95, "p99": p99, "mean": float(values.mean()), "count": len(values)}
+        return rows
+
+    def draw_overlay(self, frame):
+        lines = [f"FPS {self.fps():.1f}"] + [f"{stage} p50 {row['p50']:.1f} p95 {row['p95']:.1f} p99 {row['p99']:.1f} ms"
+                                            for stage, row in self.summary().items()]
+        for i, line in enumerate(lines):
+            cv2.putText(frame, line, (10, 20 + 18 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1)
+
+    # Prometheus text format for *.prom (e.g. node_exporter's textfile collector), CSV rows otherwise
+    def dump(self, path):
+        summary = self.summary()
+        if path.endswith(".prom"):
+            lines = ["# HELP sign_detection_stage_latency_seconds Rolling per-stage latency",
+                     "# TYPE sign_detection_stage_latency_seconds summary"]
+            for stage, row in summary.items():
+                for q, quantile in (("p50", "0.5"), ("p95", "0.95"), ("p99", "0.99")):
+                    lines.append(f'sign_detection_stage_latency_seconds{{stage="{stage}",quantile="{quantile}"}} '
+                                 f"{row[q] / 1000:.6f}")
+                lines.append(f'sign_detection_stage_latency_seconds_count{{stage="{stage}"}} {row["count"]}')
+            lines += ["# TYPE sign_detection_fps gauge", f"sign_detection_fps {self.fps():.2f}",
+                      "# TYPE sign_detection_frames_total counter", f"sign_detection_frames_total {self.frames}"]
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, path)  # Scrapers never see a half-written file
+            return
+
+        new_file = not os.path.exists(path)
+        with open(path, "a") as f:
+            if new_file:
+                f.write("time,stage,p50_ms,p95_ms,p99_ms,mean_ms,count,fps\n")
+            now = time.time()
+            fps = self.fps()
+            for stage, row in summary.items():
+                f.write(f"{now:.3f},{stage},{row['p50']:.3f},{row['p95']:.3f},{row['p99']:.3f},"
+                        f"{row['mean']:.3f},{row['count']},{fps:.2f}\n")
+
+    def print_summary(self):
+        print(f"⏱️ Stage latency over the last {self.window} samples (ms) | FPS: {self.fps():.1f}")
+        for stage, row in self.summary().items():
+            print(f"   {stage:<11} p50: {row['p50']:7.1f} | p95: {row['p95']:7.1f} | p99: {row['p99']:7.1f}")
+
+
+# ------------------------------------
+# Pipeline stages: capture thread -> inference thread -> render (main thread, required by cv2.imshow on macOS)
+# ------------------------------------
+class CaptureThread(threading.Thread):
+    def __init__(self, cap, frames, stop_event, realtime_file=True, stats=None, ready=None):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.frames = frames
+        self.stop_event = stop_event
+        self.stats = stats
+        self.ready = ready  # Set after every frame, wakes a batch inference thread waiting on several streams
+        self.done = threading.Event()
+        # Video files are read at their own frame rate so they behave like a camera
+        fps = cap.get(cv2.CAP_PROP_FPS) if realtime_file else 0
+        self.frame_interval = 1.0 / fps if fps and cap.get(cv2.CAP_PROP_FRAME_COUNT) > 0 else 0
+
+    def run(self):
+        frame_idx = 0
+        start = time.perf_counter()
+        while not self.stop_event.is_set():
+            read_start = time.perf_counter()
+            ret, frame = self.cap.read()  # Read a frame from webcam
+            if not ret:
+                break
+            if self.stats:
+                self.stats.add("capture", time.perf_counter() - read_start)
+
+            if self.frame_interval:
+                delay = start + frame_idx * self.frame_interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            # Only the newest frame is kept; stale frames are dropped instead of queueing up latency
+            put_latest(self.frames, (frame_idx, frame, time.perf_counter()))
+            if self.ready:
+                self.ready.set()
+            frame_idx += 1
+        self.frames_read = frame_idx
+        self.done.set()
+        if self.ready:
+            self.ready.set()
+
+
+class InferenceThread(threading.Thread):
+    def __init__(self, detect, frames, results, stop_event, capture_done, stats=None):
+        super().__init__(daemon=True)
+        self.detect = detect
+        self.frames = frames
+        self.results = results
+        self.stop_event = stop_event
+        self.capture_done = capture_done
+        self.stats = stats
+        self.inferences = 0
+        self.inference_seconds = 0.0
+        self.error = None
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    frame_idx, frame, captured_at = self.frames.get(timeout=0.05)
+                except queue.Empty:
+                    if self.capture_done.is_set() and self.frames.empty():
+                        break
+                    continue
+
+                start = time.perf_counter()
+                detections = self.detect(frame)
+                seconds = time.perf_counter() - start
+                self.inferences += 1
+                self.inference_seconds += seconds
+                if self.stats:
+                    self.stats.add("queue", start - captured_at)
+                    self.stats.add("inference", seconds)
+
+                put_latest(self.results, (frame_idx, frame, detections, captured_at))
+        except Exception as e:
+            self.error = e  # Re-raised by the main thread, which would otherwise wait forever
+        finally:
+            put_latest(self.results, None)  # End of stream
+
+
+def run_pipeline(model, source, detect=None, headless=False, realtime_file=True, stats=None, cap=None,
+                 startup=None):
+    cap = cap if cap is not None else open_source(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video source: {source}")
+
+    names = getattr(model, "names", None)
+    stop_event = threading.Event()
+    frames = queue.Queue(maxsize=1)
+    results = queue.Queue(maxsize=1)
+
+    capture = CaptureThread(cap, frames, stop_event, realtime_file=realtime_file, stats=stats)
+    detect = detect or (lambda frame: run_model(model, frame))
+    inference = InferenceThread(detect, frames, results, stop_event, capture.done, stats=stats)
+    capture.start()
+    inference.start()
+
+    shown = 0
+    latency_seconds = 0.0
+    start = time.perf_counter()
+    try:
+        while True:
+            try:
+                item = results.get(timeout=0.05)
+            except queue.Empty:
+                if not headless and cv2.waitKey(1) & 0xFF == ord("q"):
+                    break
+                continue
+            if item is None:
+                break
+
+            frame_idx, frame, detections, captured_at = item
+            draw_start = time.perf_counter()
+            draw_detections(frame, detections, names)
+            latency_seconds += time.perf_counter() - captured_at
+            shown += 1
+            if startup:
+                startup.first_frame()
+            if stats:
+                stats.add("draw", time.perf_counter() - draw_start)
+                if stats.overlay:
+                    stats.draw_overlay(frame)
+
+            if headless:
+                if stats:
+                    stats.add("end_to_end", time.perf_counter() - captured_at)
+                    stats.frame_done()
+                continue
+
+            # Show updated frame
+            display_start = time.perf_counter()
+            cv2.imshow("Sign Language Detection", frame)
+
+            # Press 'q' to exit
+            key = cv2.waitKey(1) & 0xFF
+            if stats:
+                now = time.perf_counter()
+                stats.add("display", now - display_start)
+                stats.add("end_to_end", now - captured_at)
+                stats.frame_done()
+            if key == ord("q"):
+                break
+    finally:
+        stop_event.set()
+        inference.join()
+        capture.join()
+        cap.release()
+        if not headless:
+            cv2.destroyAllWindows()
+
+    if inference.error:
+        raise inference.error
+
+    elapsed = time.perf_counter() - start
+    if shown:
+        mean_inference = inference.inference_seconds / inference.inferences
+        print(f"📊 Frames shown: {shown} | FPS: {shown / elapsed:.1f} | "
+              f"Inference: {mean_inference * 1000:.1f} ms | Capture-to-display: {latency_seconds / shown * 1000:.1f} ms")
+
+
+# ------------------------------------
+# Multi-stream: one capture thread per source, one batched model call per tick for all of them
+# ------------------------------------
+BATCH_WAIT_MS = 10.0  # Longest the first frame of a tick waits for the other streams' frames
+
+
+class BatchInferenceThread(threading.Thread):
+    def __init__(self, model, captures, frame_queues, result_queues, stop_event, ready, batch_wait=BATCH_WAIT_MS,
+                 stats=None):
+        super().__init__(daemon=True)
+        self.model = model
+        self.captures = captures
+        self.frame_queues = frame_queues
+        self.result_queues = result_queues
+        self.stop_event = stop_event
+        self.ready = ready
+        self.batch_wait = batch_wait / 1000
+        self.stats = stats
+        self.finished = set()
+        self.batches = 0
+        self.frames_inferred = 0
+        self.inference_seconds = 0.0
+        self.error = None
+
+    # Newest frame of every stream that has one, as {stream: (frame_idx, frame, captured_at)}. After the
+    # first frame, waits up to batch_wait for the other streams so out-of-phase cameras share one call
+    def collect(self):
+        batch = {}
+        deadline = None
+        while not self.stop_event.is_set():
+            self.ready.clear()  # Before collecting, so a frame arriving meanwhile wakes the next wait
+            for stream, frames in enumerate(self.frame_queues):
+                if stream in batch or stream in self.finished:
+                    continue
+                try:
+                    batch[stream] = frames.get_nowait()
+                except queue.Empty:
+                    if self.captures[stream].done.is_set() and frames.empty():
+                        self.finished.add(stream)
+                        put_latest(self.result_queues[stream], None)  # End of this stream
+
+            now = time.perf_counter()
+            if batch and deadline is None:
+                deadline = now + self.batch_wait
+            if len(batch) + len(self.finished) == len(self.frame_queues) or (batch and now >= deadline):
+                return batch
+            self.ready.wait(timeout=deadline - now if batch else 0.05)
+        return batch
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set() and len(self.finished) < len(self.frame_queues):
+                batch = self.collect()
+                if not batch:
+                    continue
+
+                start = time.perf_counter()
+                batch_detections = self.model.predict_batch([frame for _, frame, _ in batch.values()])
+                seconds = time.perf_counter() - start
+                self.batches += 1
+                self.frames_inferred += len(batch)
+                self.inference_seconds += seconds
+                if self.stats:
+                    self.stats.add("inference", seconds)
+
+                # Route each result back to the stream its frame came from
+                for (stream, (frame_idx, frame, captured_at)), detections in zip(batch.items(), batch_detections):
+                    if self.stats:
+                        self.stats.add("queue", start - captured_at)
+                    put_latest(self.result_queues[stream], (frame_idx, frame, detections, captured_at))
+        except Exception as e:
+            self.error = e  # Re-raised by the main thread once every stream is closed
+        finally:
+            for stream in range(len(self.result_queues)):
+                if stream not in self.finished:
+                    put_latest(self.result_queues[stream], None)
+
+
+def run_multi(model, sources, headless=False, realtime_file=True, batch_wait=BATCH_WAIT_MS, stats=None, caps=None,
+              startup=None):
+    caps = caps if caps is not None else [open_source(source) for source in sources]
+    for source, cap in zip(sources, caps):
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open video source: {source}")
+
+    names = getattr(model, "names", None)
+    stop_event = threading.Event()
+    ready = threading.Event()
+    frame_queues = [queue.Queue(maxsize=1) for _ in sources]
+    result_queues = [queue.Queue(maxsize=1) for _ in sources]
+
+    captures = [CaptureThread(cap, frames, stop_event, realtime_file=realtime_file, stats=stats, ready=ready)
+                for cap, frames in zip(caps, frame_queues)]
+    inference = BatchInferenceThread(model, captures, frame_queues, result_queues, stop_event, ready,
+                                     batch_wait=batch_wait, stats=stats)
+    for capture in captures:
+        capture.start()
+    inference.start()
+
+    shown = [0] * len(sources)
+    active = set(range(len(sources)))
+    start = time.perf_counter()
+    try:
+        while active:
+            updated = False
+            for stream in list(active):
+                try:
+                    item = result_queues[stream].get_nowait()
+                except queue.Empty:
+                    continue
+                if item is None:
+                    active.discard(stream)
+                    continue
+
+                frame_idx, frame, detections, captured_at = item
+                draw_start = time.perf_counter()
+                draw_detections(frame, detections, names)
+                shown[stream] += 1
+                if startup:
+                    startup.first_frame()
+                updated = True
+                if stats:
+                    stats.add("draw", time.perf_counter() - draw_start)
+                    if stats.overlay:
+                        stats.draw_overlay(frame)
+                if not headless:
+                    cv2.imshow(f"Sign Language Detection [{stream}] {sources[stream]}", frame)
+                if stats:
+                    stats.add("end_to_end", time.perf_counter() - captured_at)
+                    stats.frame_done()
+
+            # Press 'q' in any window to exit
+            if not headless:
+                if cv2.waitKey(1) & 0xFF == ord("q"):
+                    break
+            elif not updated:
+                time.sleep(0.001)
+    finally:
+        stop_event.set()
+        inference.join()
+        for capture in captures:
+            capture.join()
+        for cap in caps:
+            cap.release()
+        if not headless:
+            cv2.destroyAllWindows()
+
+    if inference.error:
+        raise inference.error
+
+    elapsed = time.perf_counter() - start
+    if inference.batches:
+        for stream, source in enumerate(sources):
+            print(f"📹 [{stream}] {source} | Frames shown: {shown[stream]} | FPS: {shown[stream] / elapsed:.1f}")
+        batches = inference.batches
+        print(f"📊 Streams: {len(sources)} | Total FPS: {sum(shown) / elapsed:.1f} | Batches: {batches} | "
+              f"Mean batch: {inference.frames_inferred / batches:.2f} | "
+              f"Inference: {inference.inference_seconds / batches * 1000:.1f} ms per batch")
+
+
+# Original single-threaded loop, kept for comparison
+def run_serial(model, source, detect=None, headless=False, stats=None, cap=None, startup=None):
+    cap = cap if cap is not None else open_source(source)
+    names = getattr(model, "names", None)
+    detect = detect or (lambda frame: run_model(model, frame))
+
+    while cap.isOpened():
+        start = time.perf_counter() if stats else 0
+        ret, frame = cap.read()  # Read a frame from webcam
+        if not ret:
+            break
+
+        if not stats:
+            draw_detections(frame, detect(frame), names)
+        else:
+            captured = time.perf_counter()
+            detections = detect(frame)
+            inferred = time.perf_counter()
+            draw_detections(frame, detections, names)
+            drawn = time.perf_counter()
+            for stage, seconds in [("capture", captured - start), ("inference", inferred - captured),
+                                   ("draw", drawn - inferred)]:
+                stats.add(stage, seconds)
+            if stats.overlay:
+                stats.draw_overlay(frame)
+        if startup:
+            startup.first_frame()
+
+        if headless:
+            if stats:
+                stats.add("end_to_end", time.perf_counter() - captured)
+                stats.frame_done()
+            continue
+
+        # Show updated frame
+        cv2.imshow("Sign Language Detection", frame)
+
+        # Press 'q' to exit
+        key = cv2.waitKey(1) & 0xFF
+        if stats:
+            now = time.perf_counter()
+            stats.add("display", now - drawn)
+            stats.add("end_to_end", now - captured)
+            stats.frame_done()
+        if key == ord("q"):
+            break
+
+    cap.release()
+    if not headless:
+        cv2.destroyAllWindows()
+
+
+def main():
+    # --config first, its values become the defaults of the other flags
+    config_parser = argparse.ArgumentParser(add_help=False)
+    config_parser.add_argument("--config", default=CONFIG_PATH, help="JSON with model_path, backend, class_names, cache_dir")
+    config_path = config_parser.parse_known_args()[0].config
+    config = CONFIG if config_path == CONFIG_PATH else load_config(config_path)
+
+    parser = argparse.ArgumentParser(description="Real-time sign language detection", parents=[config_parser])
+    parser.add_argument("--model", default=config.get("model_path", MODEL_PATH), help="Checkpoint (.pt) or exported .onnx")
+    parser.add_argument("--backend", choices=BACKENDS, default=config.get("backend", "torch"),
+                        help="onnx/openvino use the .onnx exported next to the .pt, or export it once into --cache-dir")
+    parser.add_argument("--cache-dir", default=config.get("cache_dir", CACHE_DIR),
+                        help="Exported models keyed by checkpoint hash ('' to disable)")
+    parser.add_argument("--warmup", type=int, default=config.get("warmup", WARMUP_PASSES),
+                        help="Warm-up passes per inference size before the first frame")
+    parser.add_argument("--server", metavar="URL", help="Use a shared inference_server.py instead of loading the model")
+    parser.add_argument("--source", nargs="+", default=[CAMERA_SOURCE],
+                        help="Webcam index or video file; several sources share one batched model call per tick")
+    parser.add_argument("--batch-wait", type=float, default=BATCH_WAIT_MS,
+                        help="With several sources, ms a frame waits for the other streams to join its batch")
+    parser.add_argument("--headless", action="store_true", help="Don't open a window (e.g. for video file tests)")
+    parser.add_argument("--no-realtime", action="store_true", help="Read video files as fast as possible")
+    parser.add_argument("--serial", action="store_true", help="Use the single-threaded loop")
+    parser.add_argument("--roi", choices=["yolo", "mediapipe"],
+                        help="Run YOLO on a crop around the hand tracked from the last box or by MediaPipe")
+    parser.add_argument("--roi-imgsz", type=int, default=ROI_IMGSZ)
+    parser.add_argument("--roi-margin", type=float, default=ROI_MARGIN)
+    parser.add_argument("--latency-budget", type=float, metavar="MS",
+                        help="Pick the inference size from --ladder to keep inference within this many ms")
+    parser.add_argument("--ladder", type=int, nargs="+", default=RESOLUTION_LADDER, help="Inference sizes to choose from")
+    parser.add_argument("--motion-gate", action="store_true", help="Reuse the last detections while the scene is static")
+    parser.add_argument("--motion-threshold", type=float, default=MOTION_THRESHOLD)
+    parser.add_argument("--motion-max-skip", type=int, default=MOTION_MAX_SKIP)
+    parser.add_argument("--stats", action="store_true", help="Time every stage and print p50/p95/p99 at exit")
+    parser.add_argument("--stats-overlay", action="store_true", help="Draw FPS and stage latencies on the frame")
+    parser.add_argument("--stats-dump", metavar="PATH", help="Periodically write stats to a .csv (appended) or .prom file")
+    parser.add_argument("--stats-interval", type=float, default=STATS_DUMP_INTERVAL, help="Seconds between dumps")
+    args = parser.parse_args()
+    if len(args.source) > 1 and (args.serial or args.roi or args.motion_gate or args.latency_budget):
+        parser.error("--serial, --roi, --motion-gate and --latency-budget work on a single --source")
+    if args.roi and args.latency_budget:
+        parser.error("--roi already runs on small crops, it can't be combined with --latency-budget")
+
+    # Cameras can take a second or more to open, do it while the model loads
+    startup = StartupTimer()
+
+    def open_camera(source):
+        cap = open_source(source)
+        startup.mark("Camera open")
+        return cap
+
+    with ThreadPoolExecutor(max_workers=len(args.source)) as pool:
+        opening = [pool.submit(open_camera, source) for source in args.source]
+        model = RemoteBackend(args.server) if args.server else load_backend(args.backend, args.model, args.cache_dir)
+        if config.get("class_names"):
+            model.names = dict(enumerate(config["class_names"]))
+        startup.mark("Model loaded")
+        warn_if_fixed_batch(model, len(args.source), "each multi-stream tick")
+        caps = [future.result() for future in opening]
+
+    # A fixed-size export ignores imgsz: ROI crops would still run at full size (and twice on fallback frames)
+    if getattr(model, "static_size", False):
+        if args.roi:
+            print(f"⚠️ {args.model} was exported at a fixed size, ignoring --roi")
+            args.roi = None
+        if args.latency_budget:
+            print(f"⚠️ {args.model} was exported at a fixed size, ignoring --latency-budget")
+            args.latency_budget = None
+
+    # The server keeps its own model warm
+    if args.warmup and not args.server and caps[0].isOpened():
+        sizes = [None, args.roi_imgsz] if args.roi else args.ladder if args.latency_budget else [None]
+        warm_up(model, frame_shape(caps[0]), sizes, batch=len(caps), passes=args.warmup)
+        startup.mark("Warm-up done")
 
-while cap.isOpened():
-    ret, frame = cap.read()  # Read a frame from webcam
-    if not ret:
-        break
+    detect = None
+    adaptive = None
+    if args.latency_budget:
+        detect = adaptive = AdaptiveResolution(model, args.latency_budget, args.ladder)
 
-    # Run YOLO on the frame
-    results = model(frame)
+    roi_detector = None
+    if args.roi:
+        detect = roi_detector = RoiDetector(model, tracker=args.roi, margin=args.roi_margin, imgsz=args.roi_imgsz)
 
-    # Manually draw bounding boxes and labels
-    for r in results:
-        for box in r.boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])  # Get bounding box coordinates
-            conf = box.conf[0]  # Confidence score
-            cls = int(box.cls[0])  # Class index
+    gate = None
+    if args.motion_gate:
+        detect = gate = MotionGatedDetector(detect or (lambda frame: run_model(model, frame)),
+                                            threshold=args.motion_threshold, max_skip=args.motion_max_skip)
 
-            # Get class name
-            class_name = model.names[cls] if hasattr(model, "names") else f"Class {cls}"
+    stats = None
+    if args.stats or args.stats_overlay or args.stats_dump:
+        stats = LatencyStats(dump_path=args.stats_dump, dump_interval=args.stats_interval, overlay=args.stats_overlay)
 
-            # Draw bounding box
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)  # Green box
+    if len(args.source) > 1:
+        run_multi(model, args.source, headless=args.headless, realtime_file=not args.no_realtime,
+                  batch_wait=args.batch_wait, stats=stats, caps=caps, startup=startup)
+    elif args.serial:
+        run_serial(model, args.source[0], detect=detect, headless=args.headless, stats=stats, cap=caps[0],
+                   startup=startup)
+    else:
+        run_pipeline(model, args.source[0], detect=detect, headless=args.headless, realtime_file=not args.no_realtime,
+                     stats=stats, cap=caps[0], startup=startup)
 
-            # Put label text
-            label = f"{class_name}: {conf:.2f}"
-            cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+    if stats:
+        stats.print_summary()
+        if args.stats_dump:
+            stats.dump(args.stats_dump)
 
-    # Show updated frame
-    cv2.imshow("Sign Language Detection", frame)
+    if adaptive:
+        adaptive.print_summary()
+    if roi_detector:
+        print(f"✂️ ROI frames: {roi_detector.roi_frames} | Full-frame fallbacks: {roi_detector.full_frames}")
+    if gate:
+        total = gate.inferences + gate.saved
+        print(f"💤 Inferences run: {gate.inferences} | Saved: {gate.saved} ({gate.saved / max(total, 1):.0%})")
 
-    # Press 'q' to exit
-    if cv2.waitKey(1) & 0xFF == ord("q"):
-        break
 
-cap.release()
-cv2.destroyAllWindows()
+if __name__ == "__main__":
+    main()
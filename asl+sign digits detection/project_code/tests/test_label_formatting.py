@@ -0,0 +1,40 @@
+import os
+import sys
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "image_processing"))
+from label_formatting import load_yolo_labels
+
+
+def make_split(tmp_path, labels):
+    image_dir = tmp_path / "images"
+    label_dir = tmp_path / "labels"
+    image_dir.mkdir()
+    label_dir.mkdir()
+    for stem, text in labels.items():
+        Image.new("RGB", (20, 10)).save(image_dir / f"{stem}.jpg")
+        (label_dir / f"{stem}.txt").write_text(text)
+    return str(image_dir), str(label_dir)
+
+
+def test_partly_numeric_line_is_skipped_without_shifting_rows(tmp_path, capsys):
+    image_dir, label_dir = make_split(tmp_path, {
+        "a": "3 0.5 oops 0.2 0.2\n1 0.1 0.2 0.3 0.4\n",
+        "b": "2 0.5 0.6 0.7 0.8\n",
+    })
+    store = load_yolo_labels(image_dir, label_dir)
+
+    assert store.files == ["a.jpg", "b.jpg"]
+    assert store.image_ids.tolist() == [0, 1]
+    assert store.classes.tolist() == [1, 2]
+    np.testing.assert_allclose(store.boxes, [[0.1, 0.2, 0.3, 0.4], [0.5, 0.6, 0.7, 0.8]])
+    assert "Skipped 1 malformed label lines" in capsys.readouterr().out
+
+
+def test_wrong_token_count_is_skipped(tmp_path):
+    image_dir, label_dir = make_split(tmp_path, {"a": "0 0.5 0.5\n0 0.5 0.5 0.2 0.2 7\n4 0.1 0.1 0.1 0.1\n"})
+    store = load_yolo_labels(image_dir, label_dir)
+
+    assert store.classes.tolist() == [4]
+    assert len(store.boxes) == 1
@@ -0,0 +1,62 @@
+import os
+import json
+
+# ------------------------------------
+# Annotation manifest
+# ------------------------------------
+# One JSON record per image, appended as labeling progresses so an interrupted run can resume:
+#   {"path": "A/A1.jpg", "class": "A", "size": 12345, "mtime_ns": 1712345678901234567, "status": "labeled"}
+# status is one of "labeled", "no_hand" or "failed". When a path appears more than once the last record wins.
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+MANIFEST_PATH = os.path.join(BASE_DIR, "data", "annotation_manifest.jsonl")
+
+STATUS_LABELED = "labeled"
+STATUS_NO_HAND = "no_hand"
+STATUS_FAILED = "failed"
+
+
+def make_record(rel_path, class_folder, size, mtime_ns, status):
+    return {"path": rel_path, "class": class_folder, "size": size, "mtime_ns": mtime_ns, "status": status}
+
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    manifest = {}
+    if not os.path.exists(manifest_path):
+        return manifest
+
+    with open(manifest_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial last line from an interrupted run
+            manifest[record["path"]] = record
+    return manifest
+
+
+# A record is current when the file on disk still has the size and mtime it was labeled with
+def is_current(record, size, mtime_ns):
+    return record is not None and record["size"] == size and record["mtime_ns"] == mtime_ns
+
+
+def append_records(manifest_path, records):
+    if not records:
+        return
+    with open(manifest_path, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# Rewrite the manifest with one record per path (drops superseded and removed entries)
+def compact_manifest(manifest_path, manifest):
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for rel_path in sorted(manifest):
+            f.write(json.dumps(manifest[rel_path]) + "\n")
+    os.replace(tmp_path, manifest_path)
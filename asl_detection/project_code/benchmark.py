@@ -0,0 +1,450 @@
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import string
+import argparse
+import platform
+import tempfile
+import subprocess
+import numpy as np
+import cv2
+
+# ------------------------------------
+# Offline benchmark of the whole pipeline on a synthetic dataset
+# ------------------------------------
+# Copies the project scripts into a scratch folder, generates a synthetic data/ tree shaped like the real
+# datasets, then runs every stage as its own process and records wall time, items/sec, peak RSS and the
+# bytes it added under data/. The realtime loop runs headless on a synthetic (or given) video with a tiny
+# generated ONNX model, so no camera, checkpoint or network is needed.
+#
+#   python benchmark.py --images-per-class 200 --output bench.json
+#   python benchmark.py compare old.json new.json
+#
+# Synthetic "hands" are bright ellipses on a darker background. MediaPipe won't find hands in them, so
+# images left without a label after bounding_box_generation.py get a box from the ellipse itself
+# (the synthetic_labels stage) and the later stages still have a full dataset to work on.
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, "data", "benchmarks")
+
+# Same layout and class map as image_extraction.py / bounding_box_generation.py
+RAW_ALPHABET_DIR = os.path.join("data", "asl_alphabet")
+RAW_DIGITS_DIR = None  # This project has no digits dataset
+class_names = list(string.ascii_uppercase)
+class_map = {name: idx for idx, name in enumerate(class_names)}
+
+IMAGES_PER_CLASS = 100
+DIGIT_IMAGES = 0
+RAW_SIZE = (200, 200)  # The Kaggle ASL alphabet images are 200x200
+VIDEO_FRAMES = 300
+VIDEO_SIZE = (640, 480)
+MODEL_IMGSZ = 320
+SEED = 0
+STAGE_TIMEOUT = 3600  # Seconds before a stage is killed and marked failed
+POLL_INTERVAL = 0.05  # Seconds between checks on a running stage
+
+
+# ------------------------------------
+# Synthetic data
+# ------------------------------------
+def synthetic_image(rng, size, gray=False):
+    w, h = size
+    # Dark textured background (never above 150) with a bright ellipse (always above 200) as the "hand"
+    background = rng.integers(20, 150, (h // 8 + 1, w // 8 + 1, 1 if gray else 3), dtype=np.uint8)
+    image = cv2.resize(background, (w, h), interpolation=cv2.INTER_LINEAR).reshape(h, w, -1)
+    axes = (int(rng.integers(w // 8, w // 4)), int(rng.integers(h // 6, h // 3)))
+    center = (int(rng.integers(axes[0], w - axes[0])), int(rng.integers(axes[1], h - axes[1])))
+    color = (255,) if gray else tuple(int(c) for c in rng.integers(210, 256, 3))
+    cv2.ellipse(image, center, axes, float(rng.uniform(0, 30)), 0, 360, color, -1)
+    return image[..., 0] if gray else image
+
+
+def generate_dataset(workdir, images_per_class=IMAGES_PER_CLASS, digit_images=DIGIT_IMAGES, seed=SEED):
+    rng = np.random.default_rng(seed)
+    count = 0
+    for name in class_names:
+        folder = os.path.join(workdir, RAW_ALPHABET_DIR, name)
+        os.makedirs(folder, exist_ok=True)
+        for i in range(images_per_class):
+            cv2.imwrite(os.path.join(folder, f"{name}{i + 1}.jpg"), synthetic_image(rng, RAW_SIZE))
+            count += 1
+
+    if RAW_DIGITS_DIR and digit_images:
+        # Same shapes and dtypes as the Sign Language Digits arrays: (N, 64, 64) float 0–1 and one-hot (N, 10)
+        folder = os.path.join(workdir, RAW_DIGITS_DIR)
+        os.makedirs(folder, exist_ok=True)
+        X = np.stack([synthetic_image(rng, (64, 64), gray=True) for _ in range(digit_images)]).astype(np.float32) / 255
+        Y = np.eye(10, dtype=np.float32)[rng.integers(0, 10, digit_images)]
+        np.save(os.path.join(folder, "X.npy"), X)
+        np.save(os.path.join(folder, "Y.npy"), Y)
+        count += digit_images
+    return count
+
+
+def generate_video(path, frames=VIDEO_FRAMES, size=VIDEO_SIZE, seed=SEED):
+    rng = np.random.default_rng(seed)
+    background = synthetic_image(rng, size)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, size)
+    w, h = size
+    for i in range(frames):
+        frame = background.copy()
+        # A "hand" sweeping across the frame
+        center = (int(w / 4 + (w / 2) * (i % 60) / 60), h // 2)
+        cv2.ellipse(frame, center, (w // 10, h // 5), 0, 0, 360, (230, 230, 230), -1)
+        writer.write(frame)
+    writer.release()
+    return frames
+
+
+# Tiny YOLOv10-style ONNX model: a strided conv and a linear layer producing the (1, 300, 6) end-to-end
+# output, with one confident box, so realtime_detection.py exercises the whole onnx path cheaply
+def build_tiny_onnx(path, imgsz=MODEL_IMGSZ, names=class_names):
+    import onnx
+    from onnx import helper, numpy_helper, TensorProto
+
+    rng = np.random.default_rng(SEED)
+    bias = np.zeros((300, 6), dtype=np.float32)
+    bias[0] = [imgsz * 0.3, imgsz * 0.3, imgsz * 0.7, imgsz * 0.7, 0.9, 0]
+    initializers = [
+        numpy_helper.from_array(rng.normal(0, 0.1, (16, 3, 3, 3)).astype(np.float32), "conv_w"),
+        numpy_helper.from_array(np.zeros((16, 1800), dtype=np.float32), "fc_w"),
+        numpy_helper.from_array(bias.reshape(1800), "fc_b"),
+        numpy_helper.from_array(np.array([1, 300, 6], dtype=np.int64), "out_shape"),
+    ]
+    nodes = [
+        helper.make_node("Conv", ["images", "conv_w"], ["conv"], strides=[4, 4], pads=[1, 1, 1, 1]),
+        helper.make_node("Relu", ["conv"], ["relu"]),
+        helper.make_node("ReduceMean", ["relu"], ["pooled"], axes=[2, 3], keepdims=0),
+        helper.make_node("MatMul", ["pooled", "fc_w"], ["fc"]),
+        helper.make_node("Add", ["fc", "fc_b"], ["flat"]),
+        helper.make_node("Reshape", ["flat", "out_shape"], ["output0"]),
+    ]
+    graph = helper.make_graph(
+        nodes, "tiny_yolo",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, [1, 3, imgsz, imgsz])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, [1, 300, 6])],
+        initializers,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8  # Loadable by older onnxruntime builds
+    helper.set_model_props(model, {"names": str(dict(enumerate(names)))})
+    onnx.save(model, path)
+
+
+# ------------------------------------
+# Measurements
+# ------------------------------------
+# Bytes under a folder, hardlinked files counted once
+def tree_bytes(folder):
+    seen = set()
+    total = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            stat = os.lstat(os.path.join(root, name))
+            if (stat.st_dev, stat.st_ino) not in seen:
+                seen.add((stat.st_dev, stat.st_ino))
+                total += stat.st_size
+    return total
+
+
+def count_images(folder):
+    count = 0
+    for root, _, files in os.walk(folder):
+        count += sum(1 for f in files if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+    return count
+
+
+# The stage runs in its own process group, so a timeout also takes down its worker processes
+def kill_stage(proc):
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    else:
+        proc.kill()
+
+
+# Waits for the stage, at most STAGE_TIMEOUT seconds. Returns (exit code, resource usage or None, timed out)
+def wait_stage(proc, timeout=STAGE_TIMEOUT):
+    deadline = time.perf_counter() + timeout
+    if not hasattr(os, "wait4"):
+        try:
+            return proc.wait(timeout=timeout), None, False
+        except subprocess.TimeoutExpired:
+            kill_stage(proc)
+            return proc.wait(), None, True
+
+    # wait4 gives the peak RSS but has no timeout, so poll it until the deadline
+    timed_out = False
+    while True:
+        pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        if time.perf_counter() > deadline:
+            kill_stage(proc)
+            _, status, usage = os.wait4(proc.pid, 0)
+            timed_out = True
+            break
+        time.sleep(POLL_INTERVAL)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, usage, timed_out
+
+
+# Run one stage as a child process: wall time, peak RSS (largest process of the stage, workers included).
+# A stage that fails or times out is marked failed and gets no rate, so it can't pass for a fast run.
+def run_stage(name, args, workdir, items, log):
+    data_dir = os.path.join(workdir, "data")
+    bytes_before = tree_bytes(data_dir)
+    print(f"⏱️ {name} ...", file=sys.stderr)
+
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable] + args, cwd=workdir, stdout=log, stderr=subprocess.STDOUT,
+                            start_new_session=True)
+    try:
+        returncode, usage, timed_out = wait_stage(proc)
+    except BaseException:  # Ctrl-C doesn't reach the stage's own session
+        kill_stage(proc)
+        raise
+    seconds = time.perf_counter() - start
+    peak_rss_mb = None
+    if usage is not None:
+        # ru_maxrss is in KiB on Linux, bytes on macOS
+        peak_rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+    failed = bool(returncode) or timed_out
+    result = {
+        "seconds": round(seconds, 3),
+        "items": items,
+        "items_per_sec": round(items / seconds, 2) if seconds and not failed else None,
+        "peak_rss_mb": round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+        "bytes_written": tree_bytes(data_dir) - bytes_before,
+        "returncode": returncode,
+        "failed": failed,
+    }
+    if timed_out:
+        result["timed_out"] = True
+        print(f"❌ {name} timed out after {STAGE_TIMEOUT}s, see {log.name}", file=sys.stderr)
+    elif failed:
+        print(f"❌ {name} exited with {returncode}, see {log.name}", file=sys.stderr)
+    return result
+
+
+# Boxes from the bright synthetic ellipse for images the labeling stage left without a label
+def write_synthetic_labels(image_dir):
+    written = 0
+    for class_folder in sorted(os.listdir(image_dir)):
+        class_path = os.path.join(image_dir, class_folder)
+        if not os.path.isdir(class_path) or class_folder not in class_map:
+            continue
+        for name in os.listdir(class_path):
+            stem, ext = os.path.splitext(name)
+            label_path = os.path.join(class_path, stem + ".txt")
+            if ext.lower() not in ('.jpg', '.jpeg', '.png') or os.path.exists(label_path):
+                continue
+            gray = cv2.imread(os.path.join(class_path, name), cv2.IMREAD_GRAYSCALE)
+            ys, xs = np.nonzero(gray > 200)
+            if not len(xs):
+                continue
+            h, w = gray.shape
+            x1, x2, y1, y2 = xs.min(), xs.max() + 1, ys.min(), ys.max() + 1
+            with open(label_path, "w") as f:
+                f.write(f"{class_map[class_folder]} {(x1 + x2) / 2 / w:.6f} {(y1 + y2) / 2 / h:.6f} "
+                        f"{(x2 - x1) / w:.6f} {(y2 - y1) / h:.6f}")
+            written += 1
+    return written
+
+
+def count_labeled(image_dir):
+    return sum(1 for _, _, files in os.walk(image_dir) for f in files if f.endswith(".txt"))
+
+
+# Stage summary from the Prometheus file realtime_detection.py --stats-dump writes at exit
+def read_prom_stats(path):
+    stats = {"stages": {}}
+    if not os.path.exists(path):
+        return stats
+    with open(path) as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            metric, value = line.rsplit(" ", 1)
+            if metric.startswith("sign_detection_stage_latency_seconds{"):
+                labels = dict(part.split("=") for part in metric[metric.index("{") + 1:-1].split(","))
+                stage = labels["stage"].strip('"')
+                quantile = labels["quantile"].strip('"')
+                key = {"0.5": "p50_ms", "0.95": "p95_ms", "0.99": "p99_ms"}[quantile]
+                stats["stages"].setdefault(stage, {})[key] = round(float(value) * 1000, 3)
+            elif metric == "sign_detection_fps":
+                stats["fps"] = float(value)
+            elif metric == "sign_detection_frames_total":
+                stats["frames_shown"] = int(value)
+    return stats
+
+
+# ------------------------------------
+# Benchmark run
+# ------------------------------------
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def copy_project(workdir):
+    for name in os.listdir(BASE_DIR):
+        path = os.path.join(BASE_DIR, name)
+        if name.endswith(".py") and name != "benchmark.py":
+            shutil.copy2(path, workdir)
+        elif name == "image_processing" and os.path.isdir(path):
+            shutil.copytree(path, os.path.join(workdir, name), ignore=shutil.ignore_patterns("__pycache__"))
+
+
+def run_benchmark(workdir, images_per_class=IMAGES_PER_CLASS, digit_images=DIGIT_IMAGES, workers=None,
+                  video=None, model=None, backend="onnx", video_frames=VIDEO_FRAMES):
+    workers = workers or os.cpu_count() or 1
+    copy_project(workdir)
+    log = open(os.path.join(workdir, "benchmark.log"), "w")
+
+    start = time.perf_counter()
+    raw_images = generate_dataset(workdir, images_per_class, digit_images)
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {"images_per_class": images_per_class, "digit_images": digit_images, "workers": workers,
+                   "classes": len(class_names), "backend": backend},
+        "generate_seconds": round(time.perf_counter() - start, 3),
+        "stages": {},
+    }
+    stages = results["stages"]
+    image_dir = os.path.join(workdir, "data", "yolo_images")
+
+    try:
+        stages["image_extraction"] = run_stage(
+            "image_extraction", ["image_extraction.py", "--workers", str(workers)], workdir, raw_images, log)
+        extracted = count_images(image_dir)
+        stages["bounding_box_generation"] = run_stage(
+            "bounding_box_generation", ["bounding_box_generation.py", "--workers", str(workers)], workdir, extracted, log)
+
+        label_start = time.perf_counter()
+        synthetic = write_synthetic_labels(image_dir)
+        stages["synthetic_labels"] = {"seconds": round(time.perf_counter() - label_start, 3), "items": synthetic}
+
+        stages["validation"] = run_stage(
+            "validation", ["bounding_box_generation_validation.py", "--allow-missing", "--workers", str(workers)],
+            workdir, extracted, log)
+        stages["dataset_splitting"] = run_stage(
+            "dataset_splitting", ["dataset_splitting.py"], workdir, count_labeled(image_dir), log)
+
+        # Realtime loop, threaded pipeline and serial loop, on a video file read as fast as possible
+        if video is None:
+            video = os.path.join(workdir, "data", "synthetic.avi")
+            generate_video(video, video_frames)
+        frames = int(cv2.VideoCapture(video).get(cv2.CAP_PROP_FRAME_COUNT))
+        if model is None:
+            model = os.path.join(workdir, "data", "tiny.onnx")
+            try:
+                build_tiny_onnx(model)
+            except ImportError:
+                model = None
+                results["realtime_skipped"] = "onnx is not installed and no --model was given"
+
+        if model is not None:
+            for name, extra in [("realtime_pipeline", []), ("realtime_serial", ["--serial"])]:
+                prom_path = os.path.join(workdir, f"{name}.prom")
+                stage = run_stage(name, ["realtime_detection.py", "--model", os.path.abspath(model), "--backend", backend,
+                                         "--source", os.path.abspath(video), "--headless", "--no-realtime",
+                                         "--stats-dump", prom_path] + extra, workdir, frames, log)
+                stage.update(read_prom_stats(prom_path))
+                stages[name] = stage
+    finally:
+        log.close()
+    return results
+
+
+# ------------------------------------
+# Compare two result files stage by stage
+# ------------------------------------
+def compare_results(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"🔍 {old.get('commit')} -> {new.get('commit')}")
+    for stage, result in new["stages"].items():
+        before = old["stages"].get(stage)
+        if not before or not before.get("seconds") or not result.get("seconds"):
+            continue
+        # A failed run stops early, its time says nothing about speed
+        failed = [label for label, r in (("old", before), ("new", result)) if r.get("failed")]
+        if failed:
+            print(f"   {stage:<24} skipped, failed in {' and '.join(failed)}")
+            continue
+        speedup = before["seconds"] / result["seconds"]
+        rss = ""
+        if before.get("peak_rss_mb") and result.get("peak_rss_mb"):
+            rss = f" | RSS {before['peak_rss_mb']:.0f} -> {result['peak_rss_mb']:.0f} MB"
+        print(f"   {stage:<24} {before['seconds']:8.2f}s -> {result['seconds']:8.2f}s ({speedup:.2f}x){rss}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on a synthetic dataset, offline")
+    sub = parser.add_subparsers(dest="command")
+
+    compare = sub.add_parser("compare", help="Compare two benchmark result files")
+    compare.add_argument("old")
+    compare.add_argument("new")
+
+    parser.add_argument("--images-per-class", type=int, default=IMAGES_PER_CLASS)
+    parser.add_argument("--digit-images", type=int, default=DIGIT_IMAGES, help="Synthetic X.npy/Y.npy size")
+    parser.add_argument("--workers", type=int, help="Worker processes given to each stage (default: all CPUs)")
+    parser.add_argument("--video", help="Recorded video for the realtime stages (default: synthetic)")
+    parser.add_argument("--video-frames", type=int, default=VIDEO_FRAMES)
+    parser.add_argument("--model", help="Exported .onnx for the realtime stages (default: tiny generated model)")
+    parser.add_argument("--backend", choices=["onnx", "openvino", "torch"], default="onnx")
+    parser.add_argument("--workdir", help="Scratch folder (default: a temporary one, deleted afterwards)")
+    parser.add_argument("--output", help="Result JSON (default: data/benchmarks/bench_<commit>_<time>.json)")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        compare_results(args.old, args.new)
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="sign_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        results = run_benchmark(workdir, args.images_per_class, args.digit_images, args.workers, args.video,
+                                args.model, args.backend, args.video_frames)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"bench_{results['commit'] or 'nogit'}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    failed = [stage for stage, result in results["stages"].items() if result.get("failed")]
+    for stage, result in results["stages"].items():
+        rate = f"{result['items_per_sec']:.1f}/s" if result.get("items_per_sec") else "-"
+        status = " | FAILED" if result.get("failed") else ""
+        print(f"📊 {stage:<24} {result['seconds']:8.2f}s | {result['items']:>6} items | {rate}{status}")
+    print(f"✅ Results written to {output}")
+    if failed:
+        print(f"❌ Failed stages: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
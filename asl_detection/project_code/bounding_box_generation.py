@@ -1,14 +1,28 @@
 import os
 import cv2
+import numpy as np
 import mediapipe as mp
 from tqdm import tqdm
 import string
+import argparse
+from multiprocessing import Pool
+import annotation_manifest as manifest_io
 
 # ------------------------------------
 # Configuration
 # ------------------------------------
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 IMAGE_DIR = os.path.join(BASE_DIR, "data", "yolo_images")
+CACHE_PATH = os.path.join(BASE_DIR, "data", "landmark_cache.npz")  # 21 landmarks per labeled image
+MANIFEST_PATH = manifest_io.MANIFEST_PATH  # Per-image size/mtime/status, lets reruns skip finished images
+
+image_exts = ('.jpg', '.jpeg', '.png')
+CHUNK_SIZE = 64  # Images per work item sent to a worker process
+PREVIEW_COUNT = 10  # Previews shown per class in --preview mode
+
+# Add padding to the bounding box to ensure the hand is fully captured
+padding = 0.1  # Vertical padding remains the same
+width_padding = 0.2  # Increase padding for width (to make the box wider)
 
 # ------------------------------------
 # Create Class Map: A–Z
@@ -18,147 +32,420 @@ class_names = letter_labels
 class_map = {name: idx for idx, name in enumerate(class_names)}
 
 # ------------------------------------
-# Initialize MediaPipe Hands
+# MediaPipe Hands
 # ------------------------------------
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(static_image_mode=False, max_num_hands=1)  # Improved accuracy with dynamic mode
+
+
+def create_hands():
+    # Still images: no tracking between frames, so results don't depend on which worker gets which chunk
+    return mp_hands.Hands(static_image_mode=True, max_num_hands=1)
+
+
+# Run MediaPipe on one image and return (landmarks, w, h); landmarks is None when no hand is found
+def detect_landmarks(hands, image_path):
+    image = cv2.imread(image_path)
+    if image is None:
+        return None, 0, 0
+
+    h, w, _ = image.shape
+    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    results = hands.process(image_rgb)
+
+    if not results.multi_hand_landmarks:
+        return [], w, h  # No hand detected
+
+    landmarks = [(lm.x, lm.y) for lm in results.multi_hand_landmarks[0].landmark]
+    return landmarks, w, h
+
+
+# Turn (N, 21, 2) normalized landmarks into padded, clamped pixel boxes (N, 4) as x_min, y_min, x_max, y_max
+def boxes_from_landmarks(landmarks, sizes, padding=padding, width_padding=width_padding, clamp=True):
+    w = sizes[:, 0].astype(np.float64)
+    h = sizes[:, 1].astype(np.float64)
+
+    # Get coordinates of all landmarks
+    x_coords = landmarks[:, :, 0].astype(np.float64) * w[:, None]
+    y_coords = landmarks[:, :, 1].astype(np.float64) * h[:, None]
+
+    # Calculate the min/max coordinates of the bounding box using the hand's outermost points
+    x_min = x_coords.min(axis=1)
+    y_min = y_coords.min(axis=1)
+    x_max = x_coords.max(axis=1)
+    y_max = y_coords.max(axis=1)
+
+    # Apply padding to the width only
+    x_min = x_min - (x_max - x_min) * width_padding
+    x_max = x_max + (x_max - x_min) * width_padding
+
+    # Apply vertical padding to the height
+    y_min = y_min - (y_max - y_min) * padding
+    y_max = y_max + (y_max - y_min) * padding
+
+    # Clamp the coordinates to ensure they stay within the image bounds
+    if clamp:
+        x_min = np.maximum(0, x_min)
+        y_min = np.maximum(0, y_min)
+        x_max = np.minimum(w, x_max)
+        y_max = np.minimum(h, y_max)
+
+    return np.stack([x_min, y_min, x_max, y_max], axis=1)
+
+
+# Pixel boxes (N, 4) -> normalized YOLO x_center, y_center, width, height (N, 4)
+def boxes_to_yolo(boxes, sizes):
+    w = sizes[:, 0].astype(np.float64)
+    h = sizes[:, 1].astype(np.float64)
+    x_min, y_min, x_max, y_max = boxes.T
+
+    box_w = (x_max - x_min) / w
+    box_h = (y_max - y_min) / h
+    x_center = (x_min + (x_max - x_min) / 2) / w
+    y_center = (y_min + (y_max - y_min) / 2) / h
+
+    return np.stack([x_center, y_center, box_w, box_h], axis=1)
+
+
+def format_yolo_line(class_id, yolo_box):
+    x_center, y_center, box_w, box_h = yolo_box
+    return f"{class_id} {x_center:.6f} {y_center:.6f} {box_w:.6f} {box_h:.6f}"
+
+
+def save_annotation(image_path, yolo_line):
+    txt_path = os.path.splitext(image_path)[0] + ".txt"
+    with open(txt_path, "w") as f:
+        f.write(yolo_line)
+
+
+def remove_annotation(image_path):
+    txt_path = os.path.splitext(image_path)[0] + ".txt"
+    if os.path.exists(txt_path):
+        os.remove(txt_path)
+
+
+def write_labels(image_paths, class_ids, landmarks, sizes, **box_kwargs):
+    yolo_boxes = boxes_to_yolo(boxes_from_landmarks(landmarks, sizes, **box_kwargs), sizes)
+    for image_path, class_id, yolo_box in zip(image_paths, class_ids, yolo_boxes):
+        save_annotation(image_path, format_yolo_line(int(class_id), yolo_box))
+
 
 # ------------------------------------
-# Loop through class folders
+# Landmark cache: one .npz with columnar arrays, paths stored relative to the image dir
 # ------------------------------------
-for class_folder in tqdm(os.listdir(IMAGE_DIR), desc="🔍 Processing class folders"):
-    class_path = os.path.join(IMAGE_DIR, class_folder)
-    if not os.path.isdir(class_path):
-        continue
-
-    if class_folder not in class_map:
-        print(f"⚠️ Skipping unknown class folder: {class_folder}")
-        continue
+def save_landmark_cache(cache_path, image_dir, image_paths, class_ids, landmarks, sizes):
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            paths=np.array([os.path.relpath(p, image_dir) for p in image_paths], dtype=str),
+            class_ids=np.asarray(class_ids, dtype=np.int16),
+            sizes=np.asarray(sizes, dtype=np.int32).reshape(-1, 2),
+            landmarks=np.asarray(landmarks, dtype=np.float32).reshape(-1, 21, 2),
+        )
+    os.replace(tmp_path, cache_path)
+
+
+def load_landmark_cache(cache_path):
+    with np.load(cache_path) as data:
+        return {key: data[key] for key in data.files}
+
+
+# Rows labeled during a run are appended here chunk by chunk (before the chunk's manifest records), so an
+# interrupted run keeps its landmarks; the next full run merges them into the .npz and removes the journal
+def journal_path_for(cache_path):
+    return cache_path + ".journal"
+
+
+def append_cache_journal(journal_path, image_dir, image_paths, class_ids, landmarks, sizes):
+    with open(journal_path, "ab") as f:
+        np.save(f, np.array([os.path.relpath(p, image_dir) for p in image_paths], dtype=str))
+        np.save(f, np.asarray(class_ids, dtype=np.int16))
+        np.save(f, np.asarray(sizes, dtype=np.int32).reshape(-1, 2))
+        np.save(f, np.asarray(landmarks, dtype=np.float32).reshape(-1, 21, 2))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def load_cache_journal(journal_path):
+    columns = {"paths": [], "class_ids": [], "sizes": [], "landmarks": []}
+    if not os.path.exists(journal_path):
+        return None
+    with open(journal_path, "rb") as f:
+        while True:
+            try:
+                chunk = [np.load(f) for _ in columns]
+            except (EOFError, ValueError, OSError):
+                break  # End of file, or a chunk cut off by the interrupt
+            for key, array in zip(columns, chunk):
+                columns[key].append(array)
+    if not columns["paths"]:
+        return None
+    return {key: np.concatenate(arrays) for key, arrays in columns.items()}
+
+
+# Saved cache plus journal rows; for a path present in both, the journal row is the newer one
+def load_cache_rows(cache_path):
+    parts = []
+    if os.path.exists(cache_path):
+        parts.append(load_landmark_cache(cache_path))
+    journal = load_cache_journal(journal_path_for(cache_path))
+    if journal is not None:
+        parts.append(journal)
+    if not parts:
+        return None
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+# Regenerate every label file from cached landmarks, no MediaPipe needed
+def labels_from_cache(image_dir, cache_path, **box_kwargs):
+    cache = load_cache_rows(cache_path)
+    if cache is None:
+        raise FileNotFoundError(f"No landmark cache at {cache_path}, run without --from-cache first")
+    image_paths = [os.path.join(image_dir, p) for p in cache["paths"]]
+    write_labels(image_paths, cache["class_ids"], cache["landmarks"], cache["sizes"], **box_kwargs)
+    print(f"📦 Rewrote {len(image_paths)} labels from {cache_path}")
 
-    class_id = class_map[class_folder]
-    image_files = [f for f in os.listdir(class_path) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
 
-    preview_count = 0  # Counter for the number of previews shown
-    for image_file in tqdm(image_files, desc=f"📂 {class_folder}", leave=False):
-        if preview_count >= 10:
-            break  # Stop after showing 10 previews
+# ------------------------------------
+# Collect work: (class_folder, class_id, [image paths]) plus {image path: (size, mtime_ns)}
+# ------------------------------------
+def collect_class_jobs(image_dir):
+    jobs = []
+    file_stats = {}
+    for class_folder in sorted(os.listdir(image_dir)):
+        class_path = os.path.join(image_dir, class_folder)
+        if not os.path.isdir(class_path):
+            continue
 
-        image_path = os.path.join(class_path, image_file)
-        image = cv2.imread(image_path)
-        if image is None:
-            print(f"❌ Failed to load image: {image_path}")
+        if class_folder not in class_map:
+            print(f"⚠️ Skipping unknown class folder: {class_folder}")
             continue
 
-        h, w, _ = image.shape
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = hands.process(image_rgb)
-
-        if not results.multi_hand_landmarks:
-            continue  # No hand detected
-
-        # Get coordinates of all landmarks
-        x_coords = [lm.x * w for lm in results.multi_hand_landmarks[0].landmark]
-        y_coords = [lm.y * h for lm in results.multi_hand_landmarks[0].landmark]
-
-        # Calculate the min/max coordinates of the bounding box using the hand's outermost points
-        x_min = min(x_coords)
-        y_min = min(y_coords)
-        x_max = max(x_coords)
-        y_max = max(y_coords)
-
-        # Add padding to the bounding box to ensure the hand is fully captured
-        padding = 0.1  # Vertical padding remains the same
-        width_padding = 0.2  # Increase padding for width (to make the box wider)
-
-        # Apply padding to the width only
-        x_min -= (x_max - x_min) * width_padding
-        x_max += (x_max - x_min) * width_padding
-
-        # Apply vertical padding to the height
-        y_min -= (y_max - y_min) * padding
-        y_max += (y_max - y_min) * padding
-
-        # Apply padding and clamp the coordinates to ensure they stay within the image bounds
-        x_min = max(0, x_min)
-        y_min = max(0, y_min)
-        x_max = min(w, x_max)
-        y_max = min(h, y_max)
-
-        # YOLO format (normalized)
-        box_w = (x_max - x_min) / w
-        box_h = (y_max - y_min) / h
-        x_center = (x_min + (x_max - x_min) / 2) / w
-        y_center = (y_min + (y_max - y_min) / 2) / h
-
-        yolo_line = f"{class_id} {x_center:.6f} {y_center:.6f} {box_w:.6f} {box_h:.6f}"
-
-        # Drawing bounding box for preview
-        image = cv2.rectangle(image, (int(x_min), int(y_min)), (int(x_max), int(y_max)), (0, 255, 0), 2)
-        image = cv2.putText(image, class_folder, (int(x_min), int(y_min)-10), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2, cv2.LINE_AA)
-
-        # Show image preview
-        cv2.imshow(f"Preview: {image_file}", image)
-        cv2.waitKey(0)  # Wait for key press to move to the next image
-        cv2.destroyAllWindows()
-
-        preview_count += 1  # Increment the preview count
-
-    # After 10 previews, prompt the user to continue or stop
-    if preview_count > 0:
-        user_input = input(f"Would you like to generate .txt files for {class_folder}? (yes/no): ").strip().lower()
-        if user_input == 'yes':
-            # Generate the .txt files for the class folder
-            for image_file in tqdm(image_files[preview_count:], desc=f"Generating .txt files for {class_folder}"):
-                image_path = os.path.join(class_path, image_file)
-                image = cv2.imread(image_path)
-                if image is None:
-                    print(f"❌ Failed to load image: {image_path}")
-                    continue
-
-                h, w, _ = image.shape
-                image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                results = hands.process(image_rgb)
-
-                if not results.multi_hand_landmarks:
-                    continue  # No hand detected
-
-                # Get coordinates of all landmarks
-                x_coords = [lm.x * w for lm in results.multi_hand_landmarks[0].landmark]
-                y_coords = [lm.y * h for lm in results.multi_hand_landmarks[0].landmark]
-
-                # Calculate the min/max coordinates of the bounding box using the hand's outermost points
-                x_min = min(x_coords)
-                y_min = min(y_coords)
-                x_max = max(x_coords)
-                y_max = max(y_coords)
-
-                # Add padding to the bounding box to ensure the hand is fully captured
-                padding = 0.1
-                width_padding = 0.2
-
-                x_min -= (x_max - x_min) * width_padding
-                x_max += (x_max - x_min) * width_padding
-                y_min -= (y_max - y_min) * padding
-                y_max += (y_max - y_min) * padding
-
-                # Apply padding and clamp the coordinates to ensure they stay within the image bounds
-                x_min = max(0, x_min)
-                y_min = max(0, y_min)
-                x_max = min(w, x_max)
-                y_max = min(h, y_max)
-
-                # YOLO format (normalized)
-                box_w = (x_max - x_min) / w
-                box_h = (y_max - y_min) / h
-                x_center = (x_min + (x_max - x_min) / 2) / w
-                y_center = (y_min + (y_max - y_min) / 2) / h
-
-                yolo_line = f"{class_id} {x_center:.6f} {y_center:.6f} {box_w:.6f} {box_h:.6f}"
-
-                # Save annotation
-                txt_filename = os.path.splitext(image_file)[0] + ".txt"
-                txt_path = os.path.join(class_path, txt_filename)
-                with open(txt_path, "w") as f:
-                    f.write(yolo_line)
-
-print("✅ YOLO annotations created and saved using MediaPipe hand detection.")
+        image_paths = []
+        for entry in os.scandir(class_path):
+            if entry.is_file() and entry.name.lower().endswith(image_exts):
+                stat = entry.stat()
+                file_stats[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                image_paths.append(entry.path)
+        jobs.append((class_folder, class_map[class_folder], sorted(image_paths)))
+    return jobs, file_stats
+
+
+# Split every class into contiguous chunks so frames of one class stay in order inside a worker
+def make_chunks(jobs, chunk_size):
+    chunks = []
+    for class_folder, class_id, image_paths in jobs:
+        for start in range(0, len(image_paths), chunk_size):
+            chunks.append((class_folder, class_id, image_paths[start:start + chunk_size]))
+    return chunks
+
+
+# ------------------------------------
+# Worker process: each one owns its own Hands instance
+# ------------------------------------
+_worker_hands = None
+
+
+def _init_worker():
+    global _worker_hands
+    _worker_hands = create_hands()
+
+
+def _annotate_chunk(chunk):
+    class_folder, class_id, image_paths = chunk
+    return [(image_path,) + detect_landmarks(_worker_hands, image_path) for image_path in image_paths]
+
+
+def _serial_results(chunks):
+    hands = create_hands()
+    for class_folder, class_id, image_paths in chunks:
+        yield [(image_path,) + detect_landmarks(hands, image_path) for image_path in image_paths]
+    hands.close()
+
+
+# ------------------------------------
+# Batch labeling (serial when workers <= 1, process pool otherwise)
+# ------------------------------------
+def generate_annotations(image_dir, workers=1, chunk_size=CHUNK_SIZE, cache_path=CACHE_PATH,
+                         manifest_path=MANIFEST_PATH, force=False, **box_kwargs):
+    jobs, file_stats = collect_class_jobs(image_dir)
+    manifest = {} if force else manifest_io.load_manifest(manifest_path)
+    if force and os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    # Landmarks from earlier runs (including an interrupted one), keyed by relative path
+    cached = {}
+    cache = None
+    journal_path = journal_path_for(cache_path) if cache_path else None
+    if cache_path and force and os.path.exists(journal_path):
+        os.remove(journal_path)
+    if cache_path and not force:
+        cache = load_cache_rows(cache_path)
+        if cache is not None:
+            cached = {p: i for i, p in enumerate(cache["paths"])}  # Later (journal) rows win
+
+    def rel(path):
+        return os.path.relpath(path, image_dir)
+
+    # Only new or changed images need MediaPipe; a labeled image without cached landmarks is redone
+    def is_done(path):
+        record = manifest.get(rel(path))
+        if not manifest_io.is_current(record, *file_stats[path]):
+            return False
+        return record["status"] != manifest_io.STATUS_LABELED or not cache_path or rel(path) in cached
+
+    pending_jobs = [(folder, class_id, [p for p in paths if not is_done(p)]) for folder, class_id, paths in jobs]
+    chunks = make_chunks(pending_jobs, chunk_size)
+    total = sum(len(paths) for _, _, paths in pending_jobs)
+    skipped = len(file_stats) - total
+
+    labeled_paths, labeled_classes, labeled_landmarks, labeled_sizes = [], [], [], []
+    no_hand = 0
+    failed = 0
+
+    pool = None
+    if workers > 1 and chunks:
+        pool = Pool(processes=workers, initializer=_init_worker)
+        # imap keeps results in submission order, so output matches the serial path
+        results_iter = pool.imap(_annotate_chunk, chunks)
+    else:
+        results_iter = _serial_results(chunks)
+
+    try:
+        with tqdm(total=total, desc="🔍 Labeling images") as progress:
+            for (class_folder, class_id, _), results in zip(chunks, results_iter):
+                chunk_paths, chunk_landmarks, chunk_sizes = [], [], []
+                records = []
+                for image_path, landmarks, w, h in results:
+                    if landmarks is None:
+                        print(f"❌ Failed to load image: {image_path}")
+                        status = manifest_io.STATUS_FAILED
+                        failed += 1
+                    elif not landmarks:
+                        status = manifest_io.STATUS_NO_HAND
+                        no_hand += 1
+                    else:
+                        status = manifest_io.STATUS_LABELED
+                        chunk_paths.append(image_path)
+                        chunk_landmarks.append(landmarks)
+                        chunk_sizes.append((w, h))
+
+                    if status != manifest_io.STATUS_LABELED:
+                        remove_annotation(image_path)  # Don't leave a label from an older version of the image
+                    records.append(manifest_io.make_record(rel(image_path), class_folder, *file_stats[image_path], status))
+
+                if chunk_paths:
+                    chunk_landmarks = np.asarray(chunk_landmarks, dtype=np.float32)
+                    chunk_sizes = np.asarray(chunk_sizes, dtype=np.int32)
+                    write_labels(chunk_paths, [class_id] * len(chunk_paths), chunk_landmarks, chunk_sizes, **box_kwargs)
+                    if cache_path:
+                        append_cache_journal(journal_path, image_dir, chunk_paths, [class_id] * len(chunk_paths),
+                                             chunk_landmarks, chunk_sizes)
+
+                    labeled_paths.extend(chunk_paths)
+                    labeled_classes.extend([class_id] * len(chunk_paths))
+                    labeled_landmarks.append(chunk_landmarks)
+                    labeled_sizes.append(chunk_sizes)
+
+                # Record the chunk only after its labels and landmarks are on disk, so a resumed run can trust it
+                manifest_io.append_records(manifest_path, records)
+                manifest.update((record["path"], record) for record in records)
+                progress.update(len(results))
+    except BaseException:
+        if pool is not None:
+            pool.terminate()  # Workers killed by Ctrl-C never send their results, join() would wait forever
+        raise
+    else:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    # Forget images that were deleted since the last run
+    current = {rel(path) for path in file_stats}
+    manifest = {p: record for p, record in manifest.items() if p in current}
+    manifest_io.compact_manifest(manifest_path, manifest)
+
+    if cache_path:
+        # Keep cached rows for images that are still labeled and were not reprocessed, then add the new ones
+        reprocessed = {rel(path) for _, _, paths in pending_jobs for path in paths}
+        keep = [i for p, i in cached.items()
+                if p in manifest and p not in reprocessed and manifest[p]["status"] == manifest_io.STATUS_LABELED]
+        new_landmarks = np.concatenate(labeled_landmarks) if labeled_landmarks else np.empty((0, 21, 2), np.float32)
+        new_sizes = np.concatenate(labeled_sizes) if labeled_sizes else np.empty((0, 2), np.int32)
+        all_paths = labeled_paths
+        all_classes = labeled_classes
+        if keep:
+            all_paths = [os.path.join(image_dir, p) for p in cache["paths"][keep]] + labeled_paths
+            all_classes = list(cache["class_ids"][keep]) + labeled_classes
+            new_landmarks = np.concatenate([cache["landmarks"][keep], new_landmarks])
+            new_sizes = np.concatenate([cache["sizes"][keep], new_sizes])
+        save_landmark_cache(cache_path, image_dir, all_paths, all_classes, new_landmarks, new_sizes)
+        if os.path.exists(journal_path):
+            os.remove(journal_path)  # Its rows are in the .npz now
+
+    print(f"📊 Labeled: {len(labeled_paths)} | No hand: {no_hand} | Failed: {failed} | Up to date: {skipped}")
+
+
+# ------------------------------------
+# Optional preview step: draw boxes for the first few images of each class
+# ------------------------------------
+def preview_annotations(image_dir, count=PREVIEW_COUNT):
+    hands = create_hands()
+    jobs, _ = collect_class_jobs(image_dir)
+    for class_folder, class_id, image_paths in jobs:
+        for image_path in image_paths[:count]:
+            landmarks, w, h = detect_landmarks(hands, image_path)
+            if not landmarks:
+                continue
+
+            box = boxes_from_landmarks(np.asarray([landmarks], np.float32), np.asarray([(w, h)]))[0]
+            x_min, y_min, x_max, y_max = box
+
+            # Drawing bounding box for preview
+            image = cv2.imread(image_path)
+            image = cv2.rectangle(image, (int(x_min), int(y_min)), (int(x_max), int(y_max)), (0, 255, 0), 2)
+            image = cv2.putText(image, class_folder, (int(x_min), int(y_min)-10), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2, cv2.LINE_AA)
+
+            # Show image preview
+            cv2.imshow(f"Preview: {os.path.basename(image_path)}", image)
+            key = cv2.waitKey(0)  # Wait for key press to move to the next image
+            cv2.destroyAllWindows()
+            if key & 0xFF == ord("q"):
+                hands.close()
+                return
+    hands.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate YOLO labels with MediaPipe hand detection")
+    parser.add_argument("--image-dir", default=IMAGE_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = serial)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--cache", default=CACHE_PATH, help="Landmark cache file ('' to disable)")
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and relabel every image")
+    parser.add_argument("--from-cache", action="store_true",
+                        help="Rewrite labels from the landmark cache instead of running MediaPipe")
+    parser.add_argument("--padding", type=float, default=padding)
+    parser.add_argument("--width-padding", type=float, default=width_padding)
+    parser.add_argument("--no-clamp", action="store_true", help="Let padded boxes extend past the image")
+    parser.add_argument("--preview", type=int, nargs="?", const=PREVIEW_COUNT, default=0,
+                        help="Only preview boxes for the first N images per class ('q' to quit)")
+    args = parser.parse_args()
+
+    if args.preview:
+        preview_annotations(args.image_dir, args.preview)
+        return
+
+    box_kwargs = dict(padding=args.padding, width_padding=args.width_padding, clamp=not args.no_clamp)
+    if args.from_cache:
+        labels_from_cache(args.image_dir, args.cache, **box_kwargs)
+        return
+
+    generate_annotations(args.image_dir, workers=args.workers, chunk_size=args.chunk_size, cache_path=args.cache,
+                         manifest_path=args.manifest, force=args.force, **box_kwargs)
+    print("✅ YOLO annotations created and saved using MediaPipe hand detection.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,12 @@
 import os
+import sys
+import json
+import string
+import argparse
+from collections import Counter
+from multiprocessing import Pool
+import numpy as np
+import annotation_manifest as manifest_io
 
 # ------------------------
 # Configuration
@@ -6,30 +14,172 @@ import os
 # Replace this with your actual base folder containing subfolders like 'A', 'B', '0', etc.
 base_folder = os.path.join(os.path.abspath(os.path.dirname(__file__)), "data", "yolo_images")
 
+# Manifest written by bounding_box_generation.py
+manifest_path = manifest_io.MANIFEST_PATH
+
+# Machine-readable result of the label checks
+report_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), "data", "label_validation.json")
+
 # Allowed image extensions
 image_extensions = ('.jpg', '.jpeg', '.png')
 
+# Same class map as bounding_box_generation.py
+letter_labels = list(string.ascii_uppercase)
+class_names = letter_labels
+class_map = {name: idx for idx, name in enumerate(class_names)}
+
+ISSUE_KINDS = ["missing_label", "orphan_label", "empty", "malformed", "multi_line",
+               "bad_class", "class_mismatch", "out_of_bounds", "zero_area"]
+
+
+# ------------------------
+# Report from the manifest (no directory walk needed)
+# ------------------------
+def print_manifest_summary(manifest):
+    print(f"\n🔍 Reading annotation manifest: {manifest_path}\n")
+
+    counts = {}
+    for record in manifest.values():
+        counts.setdefault(record["class"], Counter())[record["status"]] += 1
+
+    for subfolder in sorted(counts):
+        status = counts[subfolder]
+        total_images = sum(status.values())
+        images_with_labels = status[manifest_io.STATUS_LABELED]
+        print(f"📁 {subfolder:<10} | Images: {total_images:<4} | ✅ With .txt: {images_with_labels:<4} | "
+              f"🖐️ No hand: {status[manifest_io.STATUS_NO_HAND]:<4} | ❌ Failed: {status[manifest_io.STATUS_FAILED]}")
+
+
 # ------------------------
-# Scan Each Folder
+# Validate one folder: one scandir pass, all labels parsed into one array, checks vectorized
 # ------------------------
-print(f"\n🔍 Scanning dataset in: {base_folder}\n")
+def validate_folder(subfolder_path):
+    subfolder = os.path.basename(subfolder_path)
+    image_stems = set()
+    label_files = []
+    for entry in os.scandir(subfolder_path):
+        stem, ext = os.path.splitext(entry.name)
+        if ext.lower() in image_extensions:
+            image_stems.add(stem)
+        elif ext == ".txt":
+            label_files.append(entry.name)
+    label_files.sort()
+    label_stems = [os.path.splitext(name)[0] for name in label_files]
+
+    issues = {kind: [] for kind in ISSUE_KINDS}
+    issues["missing_label"] = sorted(image_stems.difference(label_stems))
+    issues["orphan_label"] = [name for name, stem in zip(label_files, label_stems) if stem not in image_stems]
+
+    # Parse every label line of the folder into one (rows, 5) array, remembering which file each row came from
+    line_counts = np.zeros(len(label_files), dtype=np.int64)
+    tokens = []
+    owners = []
+    for file_idx, name in enumerate(label_files):
+        with open(os.path.join(subfolder_path, name)) as f:
+            lines = [line.split() for line in f.read().splitlines() if line.strip()]
+        line_counts[file_idx] = len(lines)
+        for parts in lines:
+            if len(parts) == 5:
+                tokens.extend(parts)
+                owners.append(file_idx)
+            else:
+                issues["malformed"].append(name)
+    owners = np.asarray(owners, dtype=np.int64)
+
+    try:
+        rows = np.asarray(tokens, dtype=np.float64).reshape(-1, 5)
+    except ValueError:
+        # Some token is not a number: convert row by row to find the bad files, then drop them
+        rows = []
+        keep = []
+        for row_idx in range(len(owners)):
+            try:
+                rows.append([float(t) for t in tokens[row_idx * 5:row_idx * 5 + 5]])
+                keep.append(row_idx)
+            except ValueError:
+                issues["malformed"].append(label_files[owners[row_idx]])
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, 5)
+        owners = owners[keep]
+    cls, cx, cy, w, h = rows.T
+
+    checks = {
+        "bad_class": (cls != np.round(cls)) | (cls < 0) | (cls >= len(class_names)),
+        "class_mismatch": cls != class_map.get(subfolder, -1),
+        "out_of_bounds": ((rows[:, 1:] < 0) | (rows[:, 1:] > 1)).any(axis=1)
+                         | (cx - w / 2 < -1e-6) | (cx + w / 2 > 1 + 1e-6)
+                         | (cy - h / 2 < -1e-6) | (cy + h / 2 > 1 + 1e-6),
+        "zero_area": (w <= 0) | (h <= 0),
+    }
+    for kind, mask in checks.items():
+        issues[kind] = [label_files[i] for i in np.unique(owners[mask])]
+    issues["empty"] = [label_files[i] for i in np.flatnonzero(line_counts == 0)]
+    issues["multi_line"] = [label_files[i] for i in np.flatnonzero(line_counts > 1)]
+    issues["malformed"] = sorted(set(issues["malformed"]))
+
+    return subfolder, {
+        "images": len(image_stems),
+        "labels": len(label_files),
+        "issues": {kind: files for kind, files in issues.items() if files},
+    }
+
+
+def validate_dataset(base_folder, workers=1):
+    subfolders = [os.path.join(base_folder, name) for name in sorted(os.listdir(base_folder))
+                  if os.path.isdir(os.path.join(base_folder, name))]
+    if workers > 1:
+        with Pool(processes=workers) as pool:
+            results = pool.map(validate_folder, subfolders)
+    else:
+        results = [validate_folder(path) for path in subfolders]
+
+    folders = dict(results)
+    totals = Counter()
+    for result in folders.values():
+        totals["images"] += result["images"]
+        totals["labels"] += result["labels"]
+        for kind, files in result["issues"].items():
+            totals[kind] += len(files)
+    return {"base_folder": base_folder, "totals": dict(totals), "folders": folders}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check YOLO labels in yolo_images")
+    parser.add_argument("--base-folder", default=base_folder)
+    parser.add_argument("--report", default=report_path, help="JSON report path")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Folders checked in parallel")
+    parser.add_argument("--summary-only", action="store_true", help="Only print the manifest summary")
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="Don't fail on images without a label (e.g. no hand detected)")
+    args = parser.parse_args()
+
+    manifest = manifest_io.load_manifest(manifest_path)
+    if manifest:
+        print_manifest_summary(manifest)
+    if args.summary_only:
+        return
+
+    print(f"\n🔍 Validating labels in: {args.base_folder}\n")
+    report = validate_dataset(args.base_folder, args.workers)
 
-for subfolder in sorted(os.listdir(base_folder)):
-    subfolder_path = os.path.join(base_folder, subfolder)
-    if not os.path.isdir(subfolder_path):
-        continue
+    for subfolder, result in report["folders"].items():
+        issues = result["issues"]
+        missing = len(issues.get("missing_label", []))
+        problems = ", ".join(f"{kind}: {len(files)}" for kind, files in issues.items() if kind != "missing_label")
+        print(f"📁 {subfolder:<10} | Images: {result['images']:<4} | ✅ With .txt: {result['images'] - missing:<4} | "
+              f"❌ Missing: {missing:<4} | {problems or 'OK'}")
 
-    total_images = 0
-    images_with_labels = 0
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📝 Report written to {args.report}")
 
-    for file_name in os.listdir(subfolder_path):
-        if file_name.lower().endswith(image_extensions):
-            total_images += 1
-            base_name = os.path.splitext(file_name)[0]
-            txt_file = os.path.join(subfolder_path, base_name + '.txt')
+    # Non-zero exit so the split step can be gated on a clean dataset
+    failing = [kind for kind in ISSUE_KINDS if report["totals"].get(kind)
+               and not (args.allow_missing and kind == "missing_label")]
+    if failing:
+        print(f"❌ Label problems found: {', '.join(failing)}")
+        sys.exit(1)
+    print("✅ All labels passed validation")
 
-            if os.path.exists(txt_file):
-                images_with_labels += 1
 
-    missing = total_images - images_with_labels
-    print(f"📁 {subfolder:<10} | Images: {total_images:<4} | ✅ With .txt: {images_with_labels:<4} | ❌ Missing: {missing}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import os
+import json
+import argparse
+import numpy as np
+import cv2
+from tqdm import tqdm
+
+# ------------------------------------
+# Packed dataset shards
+# ------------------------------------
+# Packs data/yolo_dataset (images/<split>, labels/<split>) into a few large files per split:
+#
+#   <split>/shard_00000.bin          encoded image bytes back to back (or an (n, H, W, 3) uint8 .npy with --raw)
+#   <split>/shard_00000.offsets.npy  int64 (n + 1,) byte offsets of each image in the .bin
+#   <split>/shard_00000.labels.npy   float32 (m, 6) rows of image index in shard, class, cx, cy, w, h
+#   <split>/index.json               shard list, image counts and original file names
+#
+# ShardReader memory-maps the shards, so indexing returns views into the page cache instead of copies.
+#
+#   python dataset_shards.py pack               # data/yolo_dataset -> data/yolo_shards
+#   python dataset_shards.py export --output yolo_dataset_restored
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+DATASET_DIR = os.path.join(BASE_DIR, "data", "yolo_dataset")
+SHARD_DIR = os.path.join(BASE_DIR, "data", "yolo_shards")
+
+SPLITS = ['train', 'val']
+SHARD_SIZE_MB = 1024  # Start a new shard once the current one reaches this size
+image_exts = ('.jpg', '.jpeg', '.png')
+
+
+def read_label_file(label_path):
+    rows = []
+    if os.path.exists(label_path):
+        with open(label_path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 5:
+                    rows.append([float(p) for p in parts])
+    return rows
+
+
+def list_split_images(dataset_dir, split):
+    image_dir = os.path.join(dataset_dir, 'images', split)
+    if not os.path.isdir(image_dir):
+        return []
+    return sorted(e.name for e in os.scandir(image_dir) if e.name.lower().endswith(image_exts))
+
+
+# ------------------------------------
+# Writer
+# ------------------------------------
+class ShardWriter:
+    def __init__(self, split_dir, shard_size_mb=SHARD_SIZE_MB, raw_size=None):
+        os.makedirs(split_dir, exist_ok=True)
+        for entry in os.scandir(split_dir):
+            if entry.name.startswith("shard_"):
+                os.remove(entry.path)  # Leftovers from an earlier, larger pack
+        self.split_dir = split_dir
+        self.shard_bytes = shard_size_mb * 1024 * 1024
+        self.raw_size = raw_size  # (w, h) to store decoded uint8 pixels instead of encoded bytes
+        self.shards = []
+        self._open = None
+
+    def _start_shard(self):
+        name = f"shard_{len(self.shards):05d}"
+        self._open = {"name": name, "files": [], "offsets": [0], "labels": [], "pixels": []}
+        if not self.raw_size:
+            self._open["bin"] = open(os.path.join(self.split_dir, name + ".bin"), "wb")
+
+    def _size(self):
+        if self.raw_size:
+            return len(self._open["files"]) * self.raw_size[0] * self.raw_size[1] * 3
+        return self._open["offsets"][-1]
+
+    # Returns False when the image can't be decoded (raw mode only); the file is left out of the shard
+    def add(self, file_name, image_bytes, labels):
+        pixels = None
+        if self.raw_size:
+            # imdecode asserts on an empty buffer and returns None on other broken data
+            pixels = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR) if image_bytes else None
+            if pixels is None:
+                return False
+        if self._open is None:
+            self._start_shard()
+
+        index_in_shard = len(self._open["files"])
+        if self.raw_size:
+            if (pixels.shape[1], pixels.shape[0]) != self.raw_size:
+                pixels = cv2.resize(pixels, self.raw_size, interpolation=cv2.INTER_AREA)
+            self._open["pixels"].append(pixels)
+        else:
+            self._open["bin"].write(image_bytes)
+            self._open["offsets"].append(self._open["offsets"][-1] + len(image_bytes))
+
+        self._open["files"].append(file_name)
+        self._open["labels"].extend([index_in_shard] + row for row in labels)
+
+        if self._size() >= self.shard_bytes:
+            self._finish_shard()
+        return True
+
+    def _finish_shard(self):
+        shard = self._open
+        self._open = None
+        path = os.path.join(self.split_dir, shard["name"])
+
+        if self.raw_size:
+            np.save(path + ".bin.npy", np.stack(shard["pixels"]))
+        else:
+            shard["bin"].close()
+            np.save(path + ".offsets.npy", np.asarray(shard["offsets"], dtype=np.int64))
+        np.save(path + ".labels.npy", np.asarray(shard["labels"], dtype=np.float32).reshape(-1, 6))
+        self.shards.append({"name": shard["name"], "count": len(shard["files"]), "files": shard["files"]})
+
+    def close(self):
+        if self._open is not None and self._open["files"]:
+            self._finish_shard()
+        elif self._open is not None and not self.raw_size:
+            self._open["bin"].close()
+            os.remove(os.path.join(self.split_dir, self._open["name"] + ".bin"))
+
+        with open(os.path.join(self.split_dir, "index.json"), "w") as f:
+            json.dump({"raw": bool(self.raw_size), "shards": self.shards}, f)
+
+
+def pack_dataset(dataset_dir=DATASET_DIR, shard_dir=SHARD_DIR, shard_size_mb=SHARD_SIZE_MB, raw_size=None):
+    for split in SPLITS:
+        writer = ShardWriter(os.path.join(shard_dir, split), shard_size_mb, raw_size)
+        for file_name in tqdm(list_split_images(dataset_dir, split), desc=f"📦 Packing {split}"):
+            with open(os.path.join(dataset_dir, 'images', split, file_name), "rb") as f:
+                image_bytes = f.read()
+            label_path = os.path.join(dataset_dir, 'labels', split, os.path.splitext(file_name)[0] + ".txt")
+            if not writer.add(file_name, image_bytes, read_label_file(label_path)):
+                print(f"❌ Failed to load image: {os.path.join(dataset_dir, 'images', split, file_name)}")
+        writer.close()
+        print(f"✅ {split}: {sum(s['count'] for s in writer.shards)} images in {len(writer.shards)} shard(s)")
+
+
+# ------------------------------------
+# Reader
+# ------------------------------------
+class ShardReader:
+    def __init__(self, split_dir):
+        with open(os.path.join(split_dir, "index.json")) as f:
+            index = json.load(f)
+        self.raw = index["raw"]
+        self.files = []
+        self._shards = []
+        self._starts = [0]
+        for shard in index["shards"]:
+            path = os.path.join(split_dir, shard["name"])
+            if self.raw:
+                data = np.load(path + ".bin.npy", mmap_mode="r")
+                offsets = None
+            else:
+                data = np.memmap(path + ".bin", dtype=np.uint8, mode="r") if os.path.getsize(path + ".bin") else np.zeros(0, np.uint8)
+                offsets = np.load(path + ".offsets.npy", mmap_mode="r")
+            labels = np.load(path + ".labels.npy", mmap_mode="r")
+            self._shards.append((data, offsets, labels))
+            self._starts.append(self._starts[-1] + shard["count"])
+            self.files.extend(shard["files"])
+
+    def __len__(self):
+        return self._starts[-1]
+
+    def _locate(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        shard_idx = int(np.searchsorted(self._starts, idx, side="right")) - 1
+        return self._shards[shard_idx], idx - self._starts[shard_idx]
+
+    # Encoded bytes (uint8 view) or, for raw shards, the (H, W, 3) pixel view of one image; no copy either way
+    def image_data(self, idx):
+        (data, offsets, _), local = self._locate(idx)
+        if self.raw:
+            return data[local]
+        return data[offsets[local]:offsets[local + 1]]
+
+    def image(self, idx):
+        data = self.image_data(idx)
+        return np.asarray(data) if self.raw else cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+    # (k, 5) view of class, cx, cy, w, h rows; label rows are written in image order so this is a slice
+    def labels(self, idx):
+        (_, _, labels), local = self._locate(idx)
+        lo, hi = np.searchsorted(labels[:, 0], [local, local + 1])
+        return labels[lo:hi, 1:]
+
+    def __getitem__(self, idx):
+        return self.image(idx), self.labels(idx)
+
+
+# ------------------------------------
+# Exporter back to the YOLO folder layout
+# ------------------------------------
+def format_label_rows(rows):
+    return "\n".join(f"{int(c)} {x:.6f} {y:.6f} {w:.6f} {h:.6f}" for c, x, y, w, h in rows)
+
+
+def export_yolo(shard_dir=SHARD_DIR, output_dir=DATASET_DIR):
+    for split in SPLITS:
+        split_dir = os.path.join(shard_dir, split)
+        if not os.path.exists(os.path.join(split_dir, "index.json")):
+            continue
+        reader = ShardReader(split_dir)
+        image_dir = os.path.join(output_dir, 'images', split)
+        label_dir = os.path.join(output_dir, 'labels', split)
+        os.makedirs(image_dir, exist_ok=True)
+        os.makedirs(label_dir, exist_ok=True)
+
+        for idx, file_name in enumerate(tqdm(reader.files, desc=f"📤 Exporting {split}")):
+            if reader.raw:
+                cv2.imwrite(os.path.join(image_dir, file_name), reader.image(idx))
+            else:
+                with open(os.path.join(image_dir, file_name), "wb") as f:
+                    f.write(reader.image_data(idx))  # Original encoded bytes, bit-exact
+            with open(os.path.join(label_dir, os.path.splitext(file_name)[0] + ".txt"), "w") as f:
+                f.write(format_label_rows(reader.labels(idx)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the YOLO dataset into memory-mappable shards")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pack = sub.add_parser("pack")
+    pack.add_argument("--dataset", default=DATASET_DIR)
+    pack.add_argument("--shards", default=SHARD_DIR)
+    pack.add_argument("--shard-size-mb", type=int, default=SHARD_SIZE_MB)
+    pack.add_argument("--raw", type=int, metavar="SIZE", help="Store decoded SIZExSIZE uint8 pixels instead of JPEG bytes")
+
+    export = sub.add_parser("export")
+    export.add_argument("--shards", default=SHARD_DIR)
+    export.add_argument("--output", required=True)
+
+    args = parser.parse_args()
+    if args.command == "pack":
+        raw_size = (args.raw, args.raw) if args.raw else None
+        pack_dataset(args.dataset, args.shards, args.shard_size_mb, raw_size)
+    else:
+        export_yolo(args.shards, args.output)
+        print(f"✅ Exported YOLO layout to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
 import os
+import io
+import sys
 import shutil
 import random
+import string
+import tarfile
+import zipfile
+import argparse
 from tqdm import tqdm
 
 # ---------------------
@@ -11,50 +17,199 @@ output_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), "data", "y
 
 image_exts = ('.jpg', '.jpeg', '.png')
 split_ratio = 0.8  # 80% train, 20% val
+SEED = 42  # Same seed, same split
+LINK_MODE = "hardlink"  # "hardlink", "symlink" or "copy"; links fall back to copying across filesystems
+ARCHIVE_ROOT = "yolo_dataset"  # Top-level folder inside archives, as expected by aslyolotrianing.ipynb
+
+# Same class map as bounding_box_generation.py, written to data.yaml
+letter_labels = list(string.ascii_uppercase)
+class_names = letter_labels
+
+
+# ---------------------
+# Index a class folder in one scandir pass: [(image path, label path)] for images that have a label
+# ---------------------
+def index_class_folder(class_path):
+    images = {}
+    labels = set()
+    for entry in os.scandir(class_path):
+        if not entry.is_file():
+            continue
+        base_name, ext = os.path.splitext(entry.name)
+        ext = ext.lower()
+        if ext == ".txt":
+            labels.add(base_name)
+        elif ext in image_exts:
+            # Same preference as before when one name exists with several extensions
+            current = images.get(base_name)
+            if current is None or image_exts.index(ext) < image_exts.index(os.path.splitext(current)[1].lower()):
+                images[base_name] = entry.name
+
+    return [(os.path.join(class_path, images[base_name]), os.path.join(class_path, base_name + ".txt"))
+            for base_name in sorted(images) if base_name in labels]
+
+
+# ---------------------
+# Plan the split: {destination path: source path}
+# ---------------------
+def plan_split(source_dir, output_dir, split_ratio=split_ratio, seed=SEED):
+    rng = random.Random(seed)
+    plan = {}
+    for class_folder in tqdm(sorted(os.listdir(source_dir)), desc="📁 Indexing dataset"):
+        class_path = os.path.join(source_dir, class_folder)
+        if not os.path.isdir(class_path):
+            continue
+
+        # Filter image-label pairs
+        pairs = index_class_folder(class_path)
+        rng.shuffle(pairs)
+        split_idx = int(len(pairs) * split_ratio)
+
+        for split_name, split_list in [('train', pairs[:split_idx]), ('val', pairs[split_idx:])]:
+            for img_src, label_src in split_list:
+                plan[os.path.join(output_dir, 'images', split_name, os.path.basename(img_src))] = img_src
+                plan[os.path.join(output_dir, 'labels', split_name, os.path.basename(label_src))] = label_src
+    return plan
+
+
+def same_file(src_stat, dst_stat):
+    return src_stat.st_ino == dst_stat.st_ino and src_stat.st_dev == dst_stat.st_dev
+
+
+# A hardlink is current when it is the same inode; a copy (also the fallback when hardlinking fails, e.g.
+# across filesystems) when it has the source's size and is at least as new (copy2 keeps the mtime)
+def is_up_to_date(src_stat, dst_stat, mode):
+    if mode == "hardlink" and same_file(src_stat, dst_stat):
+        return True
+    return dst_stat.st_size == src_stat.st_size and dst_stat.st_mtime_ns >= src_stat.st_mtime_ns
+
+
+def link_or_copy(src, dst, mode=LINK_MODE):
+    if mode == "hardlink":
+        try:
+            os.link(src, dst)
+            return "linked"
+        except OSError:
+            pass  # Different filesystem or no hardlink support
+    elif mode == "symlink":
+        try:
+            os.symlink(os.path.abspath(src), dst)
+            return "linked"
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return "copied"
 
-# Create destination folders
-for split in ['train', 'val']:
-    os.makedirs(os.path.join(output_dir, 'images', split), exist_ok=True)
-    os.makedirs(os.path.join(output_dir, 'labels', split), exist_ok=True)
 
 # ---------------------
-# Split and Copy
+# Materialize the plan: remove files from an older split, then link what is missing
 # ---------------------
-for class_folder in tqdm(os.listdir(source_dir), desc="📁 Splitting dataset"):
-    class_path = os.path.join(source_dir, class_folder)
-    if not os.path.isdir(class_path):
-        continue
+def materialize_split(plan, output_dir, mode=LINK_MODE):
+    counts = {"linked": 0, "copied": 0, "unchanged": 0, "removed": 0}
+    pending = dict(plan)
+
+    for kind in ['images', 'labels']:
+        for split in ['train', 'val']:
+            split_dir = os.path.join(output_dir, kind, split)
+            os.makedirs(split_dir, exist_ok=True)
+            for entry in os.scandir(split_dir):
+                src = pending.get(entry.path)
+                if src is None:
+                    os.remove(entry.path)
+                    counts["removed"] += 1
+                    continue
+
+                dst_stat = entry.stat(follow_symlinks=False)
+                if mode == "symlink" and entry.is_symlink() and os.readlink(entry.path) == os.path.abspath(src):
+                    counts["unchanged"] += 1
+                    pending[entry.path] = None
+                elif mode != "symlink" and not entry.is_symlink() and is_up_to_date(os.stat(src), dst_stat, mode):
+                    counts["unchanged"] += 1
+                    pending[entry.path] = None
+                else:
+                    os.remove(entry.path)
+
+    for dst, src in tqdm(pending.items(), desc="🔗 Writing split"):
+        if src is not None:
+            counts[link_or_copy(src, dst, mode)] += 1
+    return counts
+
+
+# ---------------------
+# data.yaml for ultralytics; paths are relative to the yaml's own folder
+# ---------------------
+def data_yaml_text(names=class_names):
+    names_list = ", ".join(f"'{name}'" for name in names)
+    return f"train: images/train\nval: images/val\nnc: {len(names)}\nnames: [{names_list}]\n"
+
+
+def write_data_yaml(output_dir, names=class_names):
+    with open(os.path.join(output_dir, "data.yaml"), "w") as f:
+        f.write(data_yaml_text(names))
+
+
+# ---------------------
+# Archive mode: stream the split straight into a stored (uncompressed) .zip or .tar, nothing staged on disk
+# ---------------------
+def write_archive(plan, output_dir, archive_path, root=ARCHIVE_ROOT):
+    members = sorted((os.path.relpath(dst, output_dir), src) for dst, src in plan.items())
+    yaml_bytes = data_yaml_text().encode()
+
+    if archive_path.endswith(".zip"):
+        with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+            zf.writestr(f"{root}/data.yaml", yaml_bytes)
+            for arcname, src in tqdm(members, desc="📦 Writing zip"):
+                zf.write(src, f"{root}/{arcname}")
+    else:
+        # "-" streams an uncompressed tar to stdout, e.g. straight into a network copy
+        tar = tarfile.open(fileobj=sys.stdout.buffer, mode="w|") if archive_path == "-" else tarfile.open(archive_path, "w")
+        with tar:
+            info = tarfile.TarInfo(f"{root}/data.yaml")
+            info.size = len(yaml_bytes)
+            tar.addfile(info, io.BytesIO(yaml_bytes))
+            for arcname, src in tqdm(members, desc="📦 Writing tar", file=sys.stderr):
+                tar.add(src, f"{root}/{arcname}")
+    return len(members)
+
+
+# Iterate (member name, bytes) of a split archive one member at a time, without extracting it
+def iter_archive(archive_path, prefix=""):
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and info.filename.startswith(prefix):
+                    yield info.filename, zf.read(info)
+    else:
+        with tarfile.open(archive_path, "r:") as tar:
+            for member in tar:
+                if member.isfile() and member.name.startswith(prefix):
+                    yield member.name, tar.extractfile(member).read()
+
 
-    # Filter image-label pairs
-    valid_images = []
-    for file_name in os.listdir(class_path):
-        if file_name.lower().endswith(image_exts):
-            base_name = os.path.splitext(file_name)[0]
-            txt_path = os.path.join(class_path, base_name + ".txt")
-            if os.path.exists(txt_path):
-                valid_images.append(base_name)
+def main():
+    parser = argparse.ArgumentParser(description="Split yolo_images into a YOLO train/val dataset")
+    parser.add_argument("--source", default=source_dir)
+    parser.add_argument("--output", default=output_dir)
+    parser.add_argument("--ratio", type=float, default=split_ratio, help="Fraction of each class used for training")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--mode", choices=["hardlink", "symlink", "copy"], default=LINK_MODE)
+    parser.add_argument("--archive", help="Write a stored .zip or .tar (or '-' for a tar on stdout) instead of folders")
+    args = parser.parse_args()
 
-    random.shuffle(valid_images)
-    split_idx = int(len(valid_images) * split_ratio)
-    train_set = valid_images[:split_idx]
-    val_set = valid_images[split_idx:]
+    plan = plan_split(args.source, args.output, args.ratio, args.seed)
 
-    for split_name, split_list in [('train', train_set), ('val', val_set)]:
-        for base_name in split_list:
-            img_src = None
-            for ext in image_exts:
-                potential = os.path.join(class_path, base_name + ext)
-                if os.path.exists(potential):
-                    img_src = potential
-                    break
+    if args.archive:
+        count = write_archive(plan, args.output, args.archive)
+        print(f"\n✅ Dataset split streamed into {args.archive} ({count} files + data.yaml).", file=sys.stderr)
+        return
 
-            label_src = os.path.join(class_path, base_name + '.txt')
+    counts = materialize_split(plan, args.output, args.mode)
+    write_data_yaml(args.output)
 
-            if img_src and os.path.exists(label_src):
-                img_dst = os.path.join(output_dir, 'images', split_name, os.path.basename(img_src))
-                label_dst = os.path.join(output_dir, 'labels', split_name, os.path.basename(label_src))
+    print(f"📊 Linked: {counts['linked']} | Copied: {counts['copied']} | "
+          f"Unchanged: {counts['unchanged']} | Removed: {counts['removed']}")
+    print("\n✅ Dataset successfully split into 'train' and 'val' folders.")
 
-                shutil.copy2(img_src, img_dst)
-                shutil.copy2(label_src, label_dst)
 
-print("\n✅ Dataset successfully split into 'train' and 'val' folders.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
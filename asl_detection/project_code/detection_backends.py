@@ -0,0 +1,449 @@
+import os
+import sys
+import ast
+import glob
+import json
+import shutil
+import hashlib
+import http.client
+from urllib.parse import urlparse
+import argparse
+import cv2
+import numpy as np
+
+# ------------------------------------
+# Detector backends
+# ------------------------------------
+# Every backend is called as backend(frame, imgsz=None) on a BGR frame and returns a list of
+# (x1, y1, x2, y2, conf, cls) in frame pixels, exposes .names and has .predict_batch(frames, imgsz=None).
+#
+#   torch     ultralytics.YOLO on the .pt checkpoint (PyTorch eager)
+#   onnx      ONNX Runtime on an exported .onnx (fp32 or static int8)
+#   openvino  OpenVINO on the same .onnx file
+#   remote    a shared inference_server.py, frames sent as JPEG over HTTP (RemoteBackend)
+#
+# Export:  python detection_backends.py export --weights model/best.pt [--int8]
+# Check:   python detection_backends.py compare --weights model/best.pt --onnx model/best.onnx
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+CALIB_DIR = os.path.join(BASE_DIR, "data", "yolo_dataset", "images", "val")
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sign_detection")  # Exported models, keyed by checkpoint hash
+
+IMG_SIZE = 416  # Training size from aslyolotrianing.ipynb
+CONF_THRESHOLD = 0.25  # Same defaults as ultralytics predict
+IOU_THRESHOLD = 0.7
+CALIB_COUNT = 200
+PAD_VALUE = 114
+
+BACKENDS = ("torch", "onnx", "openvino")
+image_exts = ('.jpg', '.jpeg', '.png')
+
+
+class UltralyticsBackend:
+    def __init__(self, weights):
+        from ultralytics import YOLO  # Heavy import, only paid when this backend is used
+        self.model = YOLO(weights)
+        self.names = self.model.names
+
+    def predict_batch(self, frames, imgsz=None):
+        results = self.model(frames, imgsz=imgsz) if imgsz else self.model(frames)
+
+        batch = []
+        for r in results:
+            detections = []
+            for box in r.boxes:
+                x1, y1, x2, y2 = map(int, box.xyxy[0])  # Get bounding box coordinates
+                conf = float(box.conf[0])  # Confidence score
+                cls = int(box.cls[0])  # Class index
+                detections.append((x1, y1, x2, y2, conf, cls))
+            batch.append(detections)
+        return batch
+
+    def __call__(self, frame, imgsz=None):
+        return self.predict_batch(frame, imgsz)[0]
+
+
+# ------------------------------------
+# Pre/post-processing for exported models
+# ------------------------------------
+# Resize keeping aspect ratio and pad to a square, like ultralytics' LetterBox
+def letterbox(frame, imgsz):
+    h, w = frame.shape[:2]
+    ratio = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    pad_x = (imgsz - new_w) / 2
+    pad_y = (imgsz - new_h) / 2
+
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    frame = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(PAD_VALUE,) * 3)
+    return frame, ratio, (left, top)
+
+
+# BGR frames -> float32 NCHW RGB in [0, 1], plus the letterbox geometry of each frame
+def preprocess(frames, imgsz):
+    boxed = [letterbox(frame, imgsz) for frame in frames]
+    batch = np.stack([b[0] for b in boxed])[..., ::-1].transpose(0, 3, 1, 2)
+    batch = np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+    return batch, [(ratio, pad) for _, ratio, pad in boxed]
+
+
+# Raw output of one image -> (x1, y1, x2, y2, conf, cls) in frame pixels
+def postprocess(output, ratio, pad, frame_shape, conf_threshold=CONF_THRESHOLD, iou_threshold=IOU_THRESHOLD):
+    if output.shape[-1] == 6:
+        # YOLOv10 end-to-end head: (max_det, 6) rows of x1, y1, x2, y2, score, class, already NMS-free
+        boxes = output[:, :4]
+        scores = output[:, 4]
+        classes = output[:, 5].astype(int)
+        keep = scores >= conf_threshold
+        boxes, scores, classes = boxes[keep], scores[keep], classes[keep]
+    else:
+        # YOLOv8-style head: (4 + num_classes, anchors) of cx, cy, w, h and class scores, needs NMS
+        output = output.T
+        class_scores = output[:, 4:]
+        classes = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(classes)), classes]
+        keep = scores >= conf_threshold
+        cxcywh, scores, classes = output[keep, :4], scores[keep], classes[keep]
+        boxes = np.concatenate([cxcywh[:, :2] - cxcywh[:, 2:] / 2, cxcywh[:, :2] + cxcywh[:, 2:] / 2], axis=1)
+
+        # Class-aware NMS by offsetting each class into its own coordinate range
+        offset = classes[:, None] * 4096.0
+        nms_boxes = np.concatenate([boxes[:, :2] + offset, boxes[:, 2:] - boxes[:, :2]], axis=1)
+        indices = cv2.dnn.NMSBoxes(nms_boxes.tolist(), scores.tolist(), conf_threshold, iou_threshold)
+        indices = np.array(indices, dtype=int).reshape(-1)
+        boxes, scores, classes = boxes[indices], scores[indices], classes[indices]
+
+    # Undo the letterbox and clamp to the frame
+    h, w = frame_shape[:2]
+    boxes = (boxes - np.array([pad[0], pad[1], pad[0], pad[1]])) / ratio
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+
+    return [(int(x1), int(y1), int(x2), int(y2), float(conf), int(cls))
+            for (x1, y1, x2, y2), conf, cls in zip(boxes, scores, classes)]
+
+
+# Class names stored by the ultralytics exporter in the ONNX metadata, e.g. "{0: 'A', 1: 'B'}"
+def read_onnx_names(onnx_path):
+    import onnx
+    model = onnx.load(onnx_path, load_external_data=False)
+    metadata = {prop.key: prop.value for prop in model.metadata_props}
+    return ast.literal_eval(metadata["names"]) if "names" in metadata else None
+
+
+class OnnxBackend:
+    def __init__(self, onnx_path, conf=CONF_THRESHOLD, iou=IOU_THRESHOLD):
+        import onnxruntime as ort
+        self.session = ort.InferenceSession(onnx_path, providers=ort.get_available_providers())
+        self.input_name = self.session.get_inputs()[0].name
+        shape = self.session.get_inputs()[0].shape
+        self.fixed_batch = shape[0] if isinstance(shape[0], int) else None
+        self.static_size = isinstance(shape[2], int)
+        self.imgsz = shape[2] if self.static_size else IMG_SIZE
+        self.names = read_onnx_names(onnx_path)
+        self.conf = conf
+        self.iou = iou
+
+    def _infer(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+    def predict_batch(self, frames, imgsz=None):
+        if isinstance(frames, np.ndarray):
+            frames = [frames]
+        # Static exports only accept their own size and batch; dynamic ones take any
+        imgsz = self.imgsz if self.static_size or not imgsz else imgsz
+        step = self.fixed_batch or len(frames)
+
+        batch_detections = []
+        for start in range(0, len(frames), step):
+            chunk = frames[start:start + step]
+            # A fixed-batch export needs a full batch; pad with the last frame and ignore its outputs
+            batch, geometry = preprocess(chunk + [chunk[-1]] * (step - len(chunk)), imgsz)
+            outputs = self._infer(batch)
+            for output, (ratio, pad), frame in zip(outputs, geometry, chunk):
+                batch_detections.append(postprocess(output, ratio, pad, frame.shape, self.conf, self.iou))
+        return batch_detections
+
+    def __call__(self, frame, imgsz=None):
+        return self.predict_batch([frame], imgsz)[0]
+
+
+class OpenVinoBackend(OnnxBackend):
+    def __init__(self, onnx_path, conf=CONF_THRESHOLD, iou=IOU_THRESHOLD):
+        import openvino as ov
+        core = ov.Core()
+        model = core.read_model(onnx_path)
+        shape = model.inputs[0].get_partial_shape()
+        self.fixed_batch = shape[0].get_length() if shape[0].is_static else None
+        self.static_size = shape[2].is_static
+        self.imgsz = shape[2].get_length() if self.static_size else IMG_SIZE
+        self.compiled = core.compile_model(model, "CPU", {"PERFORMANCE_HINT": "LATENCY"})
+        self.names = read_onnx_names(onnx_path)
+        self.conf = conf
+        self.iou = iou
+
+    def _infer(self, batch):
+        return self.compiled(batch)[0]
+
+
+# Client of inference_server.py; several kiosks share the model loaded there
+REMOTE_JPEG_QUALITY = 90
+
+
+class RemoteBackend:
+    def __init__(self, url, timeout=10.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.connection = None
+        health = self._request("GET", "/health")
+        self.names = dict(enumerate(health["names"])) if health.get("names") else {}
+        self.class_ids = {name: cls for cls, name in self.names.items()}
+
+    def _request(self, method, path, body=None):
+        # One keep-alive connection, reopened once if the server closed it
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                headers = {"Content-Type": "image/jpeg"} if body is not None else {}
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                payload = json.loads(response.read())
+            except (http.client.HTTPException, ConnectionError):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+                continue
+            if response.status != 200:
+                raise RuntimeError(f"Inference server returned {response.status}: {payload.get('error')}")
+            return payload
+
+    def predict_batch(self, frames, imgsz=None):
+        if isinstance(frames, np.ndarray):
+            frames = [frames]
+        path = f"/detect?imgsz={imgsz}" if imgsz else "/detect"
+        batch = []
+        for frame in frames:
+            _, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, REMOTE_JPEG_QUALITY])
+            result = self._request("POST", path, jpeg.tobytes())
+            batch.append([(*d["xyxy"], d["conf"], self.class_id(d["class"])) for d in result["detections"]])
+        return batch
+
+    # A name the server didn't list in /health gets a new id instead of being drawn as class 0
+    def class_id(self, name):
+        if name not in self.class_ids:
+            print(f"⚠️ Inference server returned unknown class {name!r}")
+            self.class_ids[name] = max(self.names, default=-1) + 1
+            self.names[self.class_ids[name]] = name
+        return self.class_ids[name]
+
+    def __call__(self, frame, imgsz=None):
+        return self.predict_batch([frame], imgsz)[0]
+
+
+# Exported models live next to the checkpoint: best.pt -> best.onnx
+def default_onnx_path(weights):
+    return os.path.splitext(weights)[0] + ".onnx"
+
+
+# ------------------------------------
+# Artifact cache: a checkpoint is exported once per machine and found again by its content hash,
+# wherever it lives, so a replaced .pt never picks up a stale export
+# ------------------------------------
+def checkpoint_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cached_onnx_path(weights, imgsz=IMG_SIZE, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"{checkpoint_hash(weights)[:16]}_{imgsz}_dynamic.onnx")
+
+
+def cached_export(weights, imgsz=IMG_SIZE, cache_dir=CACHE_DIR):
+    cached_path = cached_onnx_path(weights, imgsz, cache_dir)
+    if not os.path.exists(cached_path):
+        print(f"📦 Exporting {weights} into the artifact cache, only needed once per checkpoint")
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cached_path + ".tmp"
+        # Dynamic batch and size, so server/multi-stream batches are one forward pass and imgsz can change
+        shutil.move(export_onnx(weights, imgsz, dynamic=True), tmp_path)
+        os.replace(tmp_path, cached_path)  # A failed export never leaves a half-written artifact
+    return cached_path
+
+
+# Exports without a dynamic batch axis run a "batch" as one forward pass per frame
+def warn_if_fixed_batch(model, batch_size, context):
+    if batch_size > 1 and getattr(model, "fixed_batch", None) == 1:
+        print(f"⚠️ The model was exported with a fixed batch size of 1, so {context} runs one forward pass per frame. "
+              f"Re-export with: python detection_backends.py export --weights <best.pt> --dynamic", file=sys.stderr)
+
+
+def load_backend(backend, model_path, cache_dir=None):
+    if backend == "torch":
+        return UltralyticsBackend(model_path)
+
+    onnx_path = default_onnx_path(model_path) if model_path.endswith(".pt") else model_path
+    if not os.path.exists(onnx_path) and cache_dir and model_path.endswith(".pt"):
+        onnx_path = cached_export(model_path, cache_dir=cache_dir)
+    if not os.path.exists(onnx_path):
+        raise FileNotFoundError(f"{onnx_path} not found, run: python detection_backends.py export --weights {model_path}")
+    if backend == "onnx":
+        return OnnxBackend(onnx_path)
+    if backend == "openvino":
+        return OpenVinoBackend(onnx_path)
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+# ------------------------------------
+# Export: best.pt -> best.onnx (optionally static int8 best.int8.onnx)
+# ------------------------------------
+def list_images(image_dir, limit=None):
+    files = sorted(glob.glob(os.path.join(image_dir, "*")))
+    files = [f for f in files if f.lower().endswith(image_exts)]
+    return files[:limit] if limit else files
+
+
+class CalibrationReader:
+    def __init__(self, image_paths, input_name, imgsz):
+        self.image_paths = iter(image_paths)
+        self.input_name = input_name
+        self.imgsz = imgsz
+
+    def get_next(self):
+        for path in self.image_paths:
+            frame = cv2.imread(path)
+            if frame is not None:
+                return {self.input_name: preprocess([frame], self.imgsz)[0]}
+        return None
+
+
+def export_onnx(weights, imgsz=IMG_SIZE, dynamic=False):
+    from ultralytics import YOLO
+    return YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=dynamic, simplify=True)
+
+
+def quantize_int8(onnx_path, calib_dir=CALIB_DIR, calib_count=CALIB_COUNT, output_path=None):
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+
+    image_paths = list_images(calib_dir, calib_count)
+    if not image_paths:
+        raise FileNotFoundError(f"No calibration images in {calib_dir}")
+
+    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    model_input = session.get_inputs()[0]
+    imgsz = model_input.shape[2] if isinstance(model_input.shape[2], int) else IMG_SIZE
+
+    output_path = output_path or os.path.splitext(onnx_path)[0] + ".int8.onnx"
+    quantize_static(
+        onnx_path,
+        output_path,
+        CalibrationReader(image_paths, model_input.name, imgsz),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+
+    # quantize_static drops custom metadata, copy the class names over
+    import onnx
+    source = onnx.load(onnx_path, load_external_data=False)
+    quantized = onnx.load(output_path)
+    onnx.helper.set_model_props(quantized, {p.key: p.value for p in source.metadata_props})
+    onnx.save(quantized, output_path)
+    return output_path
+
+
+# ------------------------------------
+# Compare: boxes from an exported backend vs the PyTorch backend
+# ------------------------------------
+def box_iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+# Greedy one-to-one matching by class and IoU; returns (matched pixel errors, unmatched count)
+def match_detections(reference, candidate, min_iou=0.5):
+    errors = []
+    unmatched = 0
+    remaining = list(candidate)
+    for ref in sorted(reference, key=lambda d: -d[4]):
+        same_class = [c for c in remaining if c[5] == ref[5]]
+        best = max(same_class, key=lambda c: box_iou(ref, c), default=None)
+        if best is None or box_iou(ref, best) < min_iou:
+            unmatched += 1
+            continue
+        remaining.remove(best)
+        errors.append(max(abs(r - c) for r, c in zip(ref[:4], best[:4])))
+    return errors, unmatched + len(remaining)
+
+
+def compare_backends(weights, model_path, backend="onnx", image_dir=CALIB_DIR, limit=100, tolerance=2.0):
+    reference = UltralyticsBackend(weights)
+    candidate = load_backend(backend, model_path)
+
+    all_errors = []
+    unmatched = 0
+    image_paths = list_images(image_dir, limit)
+    for path in image_paths:
+        frame = cv2.imread(path)
+        if frame is None:
+            continue
+        errors, missing = match_detections(reference(frame, IMG_SIZE), candidate(frame, IMG_SIZE))
+        all_errors.extend(errors)
+        unmatched += missing
+
+    max_error = max(all_errors, default=0.0)
+    print(f"📊 Images: {len(image_paths)} | Matched boxes: {len(all_errors)} | Unmatched: {unmatched} | "
+          f"Max corner error: {max_error:.1f}px")
+    ok = unmatched == 0 and max_error <= tolerance
+    print("✅ Backends agree within tolerance" if ok else f"❌ Backends differ by more than {tolerance}px")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and check detector backends")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Export best.pt to ONNX (optionally static int8)")
+    export.add_argument("--weights", required=True)
+    export.add_argument("--imgsz", type=int, default=IMG_SIZE)
+    export.add_argument("--dynamic", action="store_true", help="Dynamic batch and image size")
+    export.add_argument("--int8", action="store_true", help="Also write a static int8 model")
+    export.add_argument("--calib-dir", default=CALIB_DIR)
+    export.add_argument("--calib-count", type=int, default=CALIB_COUNT)
+
+    compare = sub.add_parser("compare", help="Check an exported model against the PyTorch backend")
+    compare.add_argument("--weights", required=True)
+    compare.add_argument("--onnx", required=True)
+    compare.add_argument("--backend", choices=BACKENDS[1:], default="onnx")
+    compare.add_argument("--images", default=CALIB_DIR)
+    compare.add_argument("--limit", type=int, default=100)
+    compare.add_argument("--tolerance", type=float, default=2.0, help="Max box corner difference in pixels")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        onnx_path = export_onnx(args.weights, args.imgsz, args.dynamic)
+        print(f"✅ Exported {onnx_path}")
+        if args.int8:
+            print(f"✅ Quantized {quantize_int8(onnx_path, args.calib_dir, args.calib_count)}")
+    else:
+        raise SystemExit(0 if compare_backends(args.weights, args.onnx, args.backend, args.images,
+                                               args.limit, args.tolerance) else 1)
+
+
+if __name__ == "__main__":
+    main()
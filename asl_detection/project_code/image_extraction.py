@@ -1,4 +1,7 @@
 import os
+import json
+import argparse
+from multiprocessing import Pool
 import numpy as np
 from PIL import Image
 from tqdm import tqdm
@@ -12,31 +15,121 @@ base_dir = os.path.abspath(os.path.dirname(__file__))
 # -----------------------------
 IMG_SIZE = (416, 416)  # Size for YOLOv10 input
 output_base = os.path.join(base_dir, "data", "yolo_images")  # New folder for clean, YOLO-ready images
+asl_source = os.path.join(base_dir, "data", "asl_alphabet")
+report_path = os.path.join(base_dir, "data", "image_extraction_errors.json")  # Per-file failures from the last run
+
+OUTPUT_FORMAT = None  # "jpg", "png" or None to keep each source file's format
+JPEG_QUALITY = 95
+
+image_exts = ('.png', '.jpg', '.jpeg')
+save_formats = {"jpg": "JPEG", "jpeg": "JPEG", "png": "PNG"}
+
 
 # -----------------------------
-# PART 2: Copy ASL Alphabet Dataset
+# Helpers
 # -----------------------------
+# Output is up to date when it exists, is not empty and is at least as new as its source
+def is_up_to_date(src_file, dst_file):
+    try:
+        dst_stat = os.stat(dst_file)
+    except FileNotFoundError:
+        return False
+    return dst_stat.st_size > 0 and dst_stat.st_mtime_ns >= os.stat(src_file).st_mtime_ns
 
-asl_source = os.path.join(base_dir, "data", "asl_alphabet")
-asl_subfolders = [f for f in os.listdir(asl_source) if os.path.isdir(os.path.join(asl_source, f))]
 
-for folder_name in tqdm(asl_subfolders, desc="Copying ASL alphabet images"):
+def convert_image(src_file, dst_file, quality=JPEG_QUALITY):
+    with Image.open(src_file) as img:
+        # Let the JPEG decoder downscale (1/2, 1/4, 1/8) while staying at or above the target size
+        if img.format == "JPEG" and (img.width > IMG_SIZE[0] or img.height > IMG_SIZE[1]):
+            img.draft("RGB", IMG_SIZE)
+        img = img.convert("RGB")  # Make sure image is RGB
+        img = img.resize(IMG_SIZE)  # Resize to YOLO size
+
+    save_format = save_formats[os.path.splitext(dst_file)[1][1:].lower()]
+    tmp_file = dst_file + ".tmp"
+    if save_format == "JPEG":
+        img.save(tmp_file, save_format, quality=quality)
+    else:
+        img.save(tmp_file, save_format)
+    os.replace(tmp_file, dst_file)  # A half-written file never looks up to date
+
+
+# -----------------------------
+# PART 2: Copy ASL Alphabet Dataset (one work item per class folder)
+# -----------------------------
+def process_asl_folder(job):
+    folder_name, output_format, quality = job
     src_folder = os.path.join(asl_source, folder_name)
     dst_folder = os.path.join(output_base, folder_name)
     os.makedirs(dst_folder, exist_ok=True)
 
-    image_files = [f for f in os.listdir(src_folder) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+    image_files = [f for f in os.listdir(src_folder) if f.lower().endswith(image_exts)]
 
+    converted = 0
+    skipped = 0
+    errors = []
     for file_name in image_files:
         src_file = os.path.join(src_folder, file_name)
-        dst_file = os.path.join(dst_folder, file_name)
+        dst_name = file_name if output_format is None else os.path.splitext(file_name)[0] + "." + output_format
+        dst_file = os.path.join(dst_folder, dst_name)
+
+        if is_up_to_date(src_file, dst_file):
+            skipped += 1
+            continue
+
+        try:
+            convert_image(src_file, dst_file, quality)
+            converted += 1
+        except Exception as e:
+            errors.append({"file": src_file, "error": str(e)})
+
+    return folder_name, converted, skipped, errors
+
+
+def copy_asl_alphabet(workers=1, output_format=OUTPUT_FORMAT, quality=JPEG_QUALITY):
+    asl_subfolders = sorted(f for f in os.listdir(asl_source) if os.path.isdir(os.path.join(asl_source, f)))
+    jobs = [(folder_name, output_format, quality) for folder_name in asl_subfolders]
+
+    converted = 0
+    skipped = 0
+    errors = []
+
+    pool = Pool(processes=workers) if workers > 1 else None
+    results = pool.imap_unordered(process_asl_folder, jobs) if pool else map(process_asl_folder, jobs)
+    try:
+        for folder_name, folder_converted, folder_skipped, folder_errors in tqdm(results, total=len(jobs), desc="Copying ASL alphabet images"):
+            converted += folder_converted
+            skipped += folder_skipped
+            errors.extend(folder_errors)
+    except BaseException:
+        if pool is not None:
+            pool.terminate()  # Workers killed by Ctrl-C never send their results, join() would wait forever
+        raise
+    else:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    errors.sort(key=lambda e: e["file"])
+    with open(report_path, "w") as f:
+        json.dump({"converted": converted, "skipped": skipped, "failed": len(errors), "errors": errors}, f, indent=2)
+
+    print(f"📊 Converted: {converted} | Up to date: {skipped} | Failed: {len(errors)}")
+    if errors:
+        print(f"❌ {len(errors)} images failed, see {report_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build YOLO-ready images from the raw datasets")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = serial)")
+    parser.add_argument("--format", choices=sorted(save_formats), default=OUTPUT_FORMAT, help="Output image format (default: keep the source format)")
+    parser.add_argument("--quality", type=int, default=JPEG_QUALITY, help="JPEG quality (1-95)")
+    args = parser.parse_args()
+
+    copy_asl_alphabet(workers=args.workers, output_format=args.format, quality=args.quality)
+
+    print("✅ All images processed and saved in 'yolo_images' folder, ready for labeling!")
 
-        if not os.path.exists(dst_file):
-            try:
-                img = Image.open(src_file).convert("RGB")  # Make sure image is RGB
-                img = img.resize(IMG_SIZE)  # Resize to YOLO size
-                img.save(dst_file)
-            except Exception as e:
-                print(f"❌ Failed to process image: {src_file}. Error: {e}")
 
-print("✅ All images processed and saved in 'yolo_images' folder, ready for labeling!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
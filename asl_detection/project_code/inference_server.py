@@ -0,0 +1,265 @@
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import cv2
+import numpy as np
+from detection_backends import BACKENDS, CACHE_DIR, load_backend, warn_if_fixed_batch
+from offline_detection import detection_records
+from realtime_detection import MODEL_PATH
+
+# ------------------------------------
+# Local inference server: one model process shared by several kiosks
+# ------------------------------------
+# Clients POST a JPEG frame to /detect and get back
+#   {"detections": [{"class": "A", "conf": 0.91, "xyxy": [x1, y1, x2, y2]}], "batch_size": 3, "queue_ms": 4.1, ...}
+# Frames from all clients wait in one queue. The batcher thread takes the oldest frame, waits at most
+# --max-wait ms after its arrival for more (up to --max-batch) and runs one predict_batch for all of them.
+# GET /metrics has Prometheus histograms of batch size, queue depth and queue wait for tuning the two knobs;
+# GET /health returns the class names.
+#
+#   python inference_server.py --model model/best.pt --backend onnx --max-batch 8 --max-wait 10
+#
+# With onnx/openvino the model needs a dynamic batch axis (detection_backends.py export --dynamic, or the
+# cached export made automatically when there is no .onnx next to the checkpoint)
+#   python realtime_detection.py --server http://127.0.0.1:8765
+
+HOST = "127.0.0.1"  # Localhost only, frames never leave the machine
+PORT = 8765
+MAX_BATCH = 8
+MAX_WAIT_MS = 10.0  # Longest a frame waits for others to join its batch
+MAX_QUEUE = 64  # Frames waiting beyond this are rejected with 503 instead of piling up latency
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+BATCH_BUCKETS = [1, 2, 4, 8, 16, 32]
+DEPTH_BUCKETS = [0, 1, 2, 4, 8, 16, 32, 64]
+WAIT_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25]
+
+
+# ------------------------------------
+# Prometheus-style cumulative histogram
+# ------------------------------------
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last one is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for le, n in zip([str(b) for b in self.buckets] + ["+Inf"], self.counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{le="{le}"}} {cumulative}')
+        lines += [f"{self.name}_sum {self.total:.6f}", f"{self.name}_count {self.count}"]
+        return lines
+
+
+# ------------------------------------
+# Micro-batcher: one thread owns the model, requests hand it (frame, imgsz) and wait on a Future
+# ------------------------------------
+class MicroBatcher(threading.Thread):
+    def __init__(self, model, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, max_queue=MAX_QUEUE):
+        super().__init__(daemon=True)
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.batch_sizes = Histogram("sign_server_batch_size", "Frames per forward pass", BATCH_BUCKETS)
+        self.queue_depth = Histogram("sign_server_queue_depth", "Frames still queued when a batch is formed",
+                                     DEPTH_BUCKETS)
+        self.queue_wait = Histogram("sign_server_queue_wait_seconds", "Time from arrival to forward pass",
+                                    WAIT_BUCKETS)
+        self.inference_seconds = 0.0
+        self.rejected = 0
+        self.errors = 0
+
+    # Returns a Future resolving to (detections, info), or None when the queue is full
+    def submit(self, frame, imgsz=None):
+        future = Future()
+        try:
+            self.requests.put_nowait((time.perf_counter(), frame, imgsz, future))
+        except queue.Full:
+            with self.lock:
+                self.rejected += 1
+            return None
+        return future
+
+    # Oldest request, then whatever arrives before its deadline, up to max_batch
+    def next_batch(self):
+        batch = [self.requests.get()]
+        deadline = batch[0][0] + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            depth = self.requests.qsize()
+            start = time.perf_counter()
+            with self.lock:
+                self.batch_sizes.observe(len(batch))
+                self.queue_depth.observe(depth)
+                for arrival, *_ in batch:
+                    self.queue_wait.observe(start - arrival)
+
+            # Frames asking for different sizes can't share a tensor; normally there is a single group
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[2], []).append(item)
+            for imgsz, items in groups.items():
+                group_start = time.perf_counter()
+                try:
+                    results = self.model.predict_batch([frame for _, frame, _, _ in items], imgsz=imgsz)
+                except Exception as e:
+                    with self.lock:
+                        self.errors += len(items)
+                    for *_, future in items:
+                        future.set_exception(e)
+                    continue
+                elapsed = time.perf_counter() - group_start
+                with self.lock:
+                    self.inference_seconds += elapsed
+
+                for (arrival, _, _, future), detections in zip(items, results):
+                    info = {"batch_size": len(items), "queue_ms": round((start - arrival) * 1000, 2),
+                            "inference_ms": round(elapsed * 1000, 2)}
+                    future.set_result((detections, info))
+
+    def metrics(self):
+        with self.lock:
+            lines = self.batch_sizes.lines() + self.queue_depth.lines() + self.queue_wait.lines()
+            lines += ["# TYPE sign_server_queue_length gauge", f"sign_server_queue_length {self.requests.qsize()}",
+                      "# TYPE sign_server_inference_seconds_total counter",
+                      f"sign_server_inference_seconds_total {self.inference_seconds:.6f}",
+                      "# TYPE sign_server_rejected_total counter", f"sign_server_rejected_total {self.rejected}",
+                      "# TYPE sign_server_errors_total counter", f"sign_server_errors_total {self.errors}"]
+        return "\n".join(lines) + "\n"
+
+
+# ------------------------------------
+# HTTP front end (HTTP/1.1 keep-alive, so a kiosk reuses one connection for every frame)
+# ------------------------------------
+class DetectionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body go out in separate writes, don't let the body wait for an ACK
+
+    def send_body(self, status, body, content_type="application/json"):
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload))
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/metrics":
+            self.send_body(200, self.server.batcher.metrics(), "text/plain; version=0.0.4")
+        elif path == "/health":
+            self.send_json(200, {"status": "ok", "names": self.server.names})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/detect":
+            self.send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if not 0 < length <= MAX_BODY_BYTES:
+            self.send_json(413 if length else 400, {"error": "expected a JPEG body"})
+            self.close_connection = True  # The unread body would be taken for the next request
+            return
+
+        # Decoding happens on the request's own thread, in parallel with the batcher
+        frame = cv2.imdecode(np.frombuffer(self.rfile.read(length), np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            self.send_json(400, {"error": "could not decode image"})
+            return
+        imgsz = parse_qs(url.query).get("imgsz", [None])[0]
+        if imgsz is not None and (not imgsz.isdigit() or int(imgsz) == 0):
+            self.send_json(400, {"error": f"imgsz must be a positive integer, got {imgsz!r}"})
+            return
+
+        future = self.server.batcher.submit(frame, int(imgsz) if imgsz else None)
+        if future is None:
+            self.send_json(503, {"error": "queue full"})
+            return
+        try:
+            detections, info = future.result()
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+            return
+        self.send_json(200, {"detections": detection_records(detections, self.server.names), **info})
+
+    def log_message(self, format, *args):
+        pass  # One line per frame would drown the console
+
+
+def serve(model, host=HOST, port=PORT, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, max_queue=MAX_QUEUE):
+    warn_if_fixed_batch(model, max_batch, "each micro-batch")
+    batcher = MicroBatcher(model, max_batch, max_wait_ms, max_queue)
+    batcher.start()
+
+    server = ThreadingHTTPServer((host, port), DetectionHandler)
+    server.daemon_threads = True
+    server.batcher = batcher
+    names = model.names
+    server.names = [names[i] for i in sorted(names)] if isinstance(names, dict) else names
+
+    print(f"✅ Serving on http://{host}:{port} | max batch {max_batch} | max wait {max_wait_ms} ms", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sizes = batcher.batch_sizes
+        if sizes.count:
+            print(f"📊 Batches: {sizes.count} | Frames: {sizes.total:.0f} | "
+                  f"Mean batch: {sizes.total / sizes.count:.2f} | Rejected: {batcher.rejected}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared sign detection model with micro-batching over HTTP")
+    parser.add_argument("--model", default=MODEL_PATH, help="Checkpoint (.pt) or exported .onnx")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="Most frames per forward pass")
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT_MS, help="Milliseconds a frame waits for a batch")
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE, help="Queued frames before new ones get 503")
+    args = parser.parse_args()
+
+    model = load_backend(args.backend, args.model, CACHE_DIR)
+    serve(model, args.host, args.port, args.max_batch, args.max_wait, args.max_queue)
+
+
+if __name__ == "__main__":
+    main()